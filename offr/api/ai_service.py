@@ -4,33 +4,90 @@ Shared AI service layer for Offr.
 Provides a single, reusable wrapper for Gemini JSON calls with:
   - Structured error taxonomy (safe to serialise to frontend)
   - Configurable timeout (default 25 s) with PROVIDER_TIMEOUT error
-  - Up to 2 retries with exponential backoff for transient errors (429, 503, timeout)
+  - Up to 2 retries with jittered exponential backoff for transient errors (429, 503, timeout)
   - Safe structured logging — no secrets, no raw prompt content
   - Trace IDs for correlating logs across requests
   - request_id propagation on all error responses
+  - Opt-in in-process LRU+TTL response cache for repeatable prompts
+  - Circuit breaker that fails fast while Gemini is down
+  - Bulkhead capping concurrent Gemini requests, auto-tuned by AIMD
+  - Proactive sliding-window requests-per-minute limiter (GEMINI_RPM)
 
 Usage:
     from api.ai_service import call_gemini_json, is_gemini_available, AIError
 
     result, err, latency_ms = call_gemini_json(prompt, trace_id="abc123")
+    # or, inside an async route:
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id="abc123")
     if err:
         return JSONResponse(err.to_dict(request_id="abc123"), status_code=err.status_code)
 """
 from __future__ import annotations
 
+import asyncio
+import atexit
+import concurrent.futures
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
+import random
 import re
+import threading
 import time
 import uuid
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speed-up — stdlib parser behaves the same for our payloads
+    _json_loads = json.loads
+
+try:
+    from blake3 import blake3 as _key_hasher
+except ImportError:  # optional speed-up for cache keys — sha256 is plenty at our prompt sizes
+    _key_hasher = hashlib.sha256
 
 logger = logging.getLogger("offr.ai")
 
 # Default call timeout in seconds — override with GEMINI_TIMEOUT_SECONDS env var
 _DEFAULT_TIMEOUT_S = 25
 
+# Retry backoff: base * 2**attempt, stretched by up to +50% random jitter, capped
+_BACKOFF_BASE_S = 2.0
+_BACKOFF_CAP_S = 30.0
+_BACKOFF_JITTER = 0.5
+
+# Circuit breaker: consecutive provider failures before tripping, and how long to stay open
+_BREAKER_FAIL_THRESHOLD = 5
+_BREAKER_COOLDOWN_S = 30.0
+
+# AIMD concurrency tuning: bounds, additive step, multiplicative backoff, latency target
+_AIMD_MIN = 1
+_AIMD_MAX = 32
+_AIMD_ALPHA = 0.5
+_AIMD_BETA = 0.5
+_AIMD_TARGET_LATENCY_MS = 1500
+_AIMD_WINDOW = 20
+
+# Proactive rate limit — override with GEMINI_RPM env var to match the project's quota
+_DEFAULT_RPM = 60
+_RPM_WINDOW_S = 60.0
+
+# Worker threads shared by all Gemini calls — override with GEMINI_MAX_CONCURRENCY env var
+_DEFAULT_MAX_CONCURRENCY = 8
+
+# Response cache bounds — override TTL with GEMINI_CACHE_TTL_SECONDS env var
+_CACHE_MAX_ENTRIES = 1024
+_CACHE_DEFAULT_TTL_S = 1800
+
+# Longest model output / exception text echoed into a single log line
+_LOG_SNIPPET_CHARS = 2048
+
 
 # ─────────────────────────────────────────────────────────────
 # Error taxonomy
@@ -60,10 +117,472 @@ class AIError:
             "message": self.message,
             "retryable": self.retryable,
             "request_id": request_id or "",
-            "details": self.details,
+            "details": dict(self.details),
         }
 
 
+# ─────────────────────────────────────────────────────────────
+# Response cache
+# ─────────────────────────────────────────────────────────────
+
+class _LLMCache:
+    """
+    Exact-match LRU cache for parsed Gemini responses, with a per-entry TTL.
+
+    Keys are a blake3 (or sha256) digest over (model, temperature, config_extra, prompt), so any
+    change to the prompt or generation settings is a miss. Entries are
+    deep-copied on the way in and out — callers are free to mutate results.
+    """
+
+    def __init__(self, max_entries: int = _CACHE_MAX_ENTRIES, ttl_s: float = _CACHE_DEFAULT_TTL_S) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(
+        model: str,
+        prompt: str,
+        temperature: float,
+        config_extra: Optional[Dict[str, Any]],
+    ) -> str:
+        raw = json.dumps(
+            {"model": model, "prompt": prompt, "temperature": temperature, "extra": config_extra or {}},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return _key_hasher(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._cache[key]
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.monotonic() + self.ttl_s
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._cache[key] = (stored, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _cache_ttl_s() -> float:
+    try:
+        return float(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(_CACHE_DEFAULT_TTL_S)))
+    except (ValueError, TypeError):
+        return _CACHE_DEFAULT_TTL_S
+
+
+_RESPONSE_CACHE = _LLMCache(ttl_s=_cache_ttl_s())
+
+
+class _SharedCall:
+    """One in-flight Gemini task plus the number of requests awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+# Cacheable async calls currently on the wire, keyed by (event loop, cache key).
+# The response cache only helps once a call has finished; identical requests
+# that arrive while it is still running join it here instead of re-sending.
+_SHARED_CALLS: Dict[Tuple[Any, str], _SharedCall] = {}
+
+
+async def _await_shared_call(
+    tid: str,
+    cache_key: str,
+    send: Callable[[], Awaitable[Tuple[Optional[Dict[str, Any]], Optional[AIError], int]]],
+) -> Tuple[Optional[Dict[str, Any]], Optional[AIError], int]:
+    """
+    Run send() once per cache_key and share the outcome with every concurrent
+    caller. Each caller gets its own deep copy of the result. The shared task
+    is cancelled only when its last waiter is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    slot_key = (loop, cache_key)
+    shared = _SHARED_CALLS.get(slot_key)
+    if shared is None:
+        shared = _SharedCall(loop.create_task(send()))
+        _SHARED_CALLS[slot_key] = shared
+
+        def _forget(_task: "asyncio.Task", shared: _SharedCall = shared) -> None:
+            if _SHARED_CALLS.get(slot_key) is shared:
+                del _SHARED_CALLS[slot_key]
+
+        shared.task.add_done_callback(_forget)
+    else:
+        logger.info("[%s] gemini coalesced with in-flight call waiters=%d", tid, shared.waiters)
+
+    shared.waiters += 1
+    try:
+        result, err, latency_ms = await asyncio.shield(shared.task)
+    except asyncio.CancelledError:
+        if shared.waiters == 1 and not shared.task.done():
+            # Nobody else wants it — stop the call, and let the next request start afresh
+            if _SHARED_CALLS.get(slot_key) is shared:
+                del _SHARED_CALLS[slot_key]
+            shared.task.cancel()
+        raise
+    finally:
+        shared.waiters -= 1
+    return (copy.deepcopy(result) if result is not None else None), err, latency_ms
+
+
+def _max_concurrency() -> int:
+    try:
+        return max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", str(_DEFAULT_MAX_CONCURRENCY))))
+    except (ValueError, TypeError):
+        return _DEFAULT_MAX_CONCURRENCY
+
+
+# One pool for the process lifetime: the SDK call is blocking, so we run it on a
+# worker thread purely to enforce a deadline. Creating a pool per attempt cost a
+# thread spawn + join every time. Sized to the AIMD ceiling so it never queues
+# work the bulkhead has admitted; threads are only spawned on demand.
+_GEMINI_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(_max_concurrency(), _AIMD_MAX),
+    thread_name_prefix="gemini",
+)
+atexit.register(_GEMINI_EXECUTOR.shutdown, wait=False)
+
+
+# ─────────────────────────────────────────────────────────────
+# Circuit breaker
+# ─────────────────────────────────────────────────────────────
+
+class _CircuitBreaker:
+    """
+    Closed → Open → Half-open breaker around Gemini calls.
+
+    After `fail_threshold` consecutive provider failures the breaker opens and
+    calls are rejected immediately for `cooldown_s`, instead of each request
+    burning timeout × retries against a dead endpoint. After the cooldown a
+    single probe call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, fail_threshold: int = _BREAKER_FAIL_THRESHOLD, cooldown_s: float = _BREAKER_COOLDOWN_S) -> None:
+        self.fail_threshold = fail_threshold
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.fails = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown_s:
+                    return False
+                self.state = "half_open"
+                self._probe_in_flight = True
+                return True
+            # half_open: exactly one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.fails = 0
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot that was granted but never used."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+            self.fails += 1
+            if self.state == "half_open" or self.fails >= self.fail_threshold:
+                if self.state != "open":
+                    logger.warning("[breaker] gemini circuit open after %d consecutive failure(s)", self.fails)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_BREAKER = _CircuitBreaker()
+
+
+# ─────────────────────────────────────────────────────────────
+# Bulkhead
+# ─────────────────────────────────────────────────────────────
+
+class _BulkheadWaiter:
+    """One queued acquire. Exactly one of `event` (sync) / `loop`+`fut` (async) is set."""
+
+    __slots__ = ("granted", "event", "loop", "fut")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.granted = False
+        self.loop = loop
+        self.fut: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+        self.event: Optional[threading.Event] = None if loop is not None else threading.Event()
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.fut.done():
+            self.fut.set_result(True)
+
+
+class _Bulkhead:
+    """
+    Caps the number of Gemini requests in flight across the process.
+
+    Callers that find it full join one FIFO queue — threads block on an Event,
+    coroutines await a future — and release() / resize() hand freed slots
+    straight to the oldest waiter, so neither kind polls or jumps the other.
+    Futures are resolved with call_soon_threadsafe, since release() can run on
+    any thread. `in_flight` counts granted slots and is reported in logs.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self._waiters: "deque[_BulkheadWaiter]" = deque()
+        self._lock = threading.Lock()
+
+    def _try_take(self) -> bool:
+        # Caller holds _lock. A free slot only goes to a newcomer when nobody is queued.
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def _dispatch(self) -> None:
+        # Caller holds _lock. The slot is counted here, before the waiter wakes,
+        # so a newcomer can't take it in between.
+        while self._waiters and self.in_flight < self.limit:
+            w = self._waiters.popleft()
+            self.in_flight += 1
+            w.granted = True
+            try:
+                w.wake()
+            except RuntimeError:  # waiter's event loop already closed — nobody to hand it to
+                w.granted = False
+                self.in_flight -= 1
+
+    def _abandon(self, w: _BulkheadWaiter) -> bool:
+        """Timed out / cancelled: leave the queue. True if a slot was granted anyway."""
+        with self._lock:
+            if w.granted:
+                return True
+            self._waiters.remove(w)
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._try_take():
+                return True
+            if timeout is not None and timeout <= 0:
+                return False
+            w = _BulkheadWaiter()
+            self._waiters.append(w)
+        w.event.wait(timeout)
+        return self._abandon(w)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._try_take():
+                return True
+            if timeout is not None and timeout <= 0:
+                return False
+            w = _BulkheadWaiter(asyncio.get_running_loop())
+            self._waiters.append(w)
+        try:
+            # shield: a timeout must not cancel the future a concurrent hand-off is resolving
+            await asyncio.wait_for(asyncio.shield(w.fut), timeout)
+        except asyncio.TimeoutError:
+            return self._abandon(w)
+        except BaseException:
+            if self._abandon(w):
+                self.release()  # granted as we were cancelled — pass the slot on
+            raise
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def resize(self, limit: int) -> None:
+        with self._lock:
+            self.limit = limit
+            self._dispatch()
+
+
+def _max_inflight() -> int:
+    try:
+        return max(1, int(os.getenv("GEMINI_MAX_INFLIGHT", str(_max_concurrency()))))
+    except (ValueError, TypeError):
+        return _max_concurrency()
+
+
+_BULKHEAD = _Bulkhead(_max_inflight())
+
+
+class _ConcurrencyController:
+    """
+    AIMD tuning of the bulkhead limit, in the style of TCP congestion control.
+
+    While the rolling mean latency stays under target, each success adds
+    `alpha` to the allowed concurrency; overload signals (429 rate limit,
+    503 unavailable/overloaded, timeout) or a slow rolling mean multiply it by `beta`. The latency window
+    is cleared after each decrease so one slow period only halves it once.
+    """
+
+    _OVERLOAD_CODES = frozenset({"PROVIDER_RATE_LIMIT", "PROVIDER_UNAVAILABLE", "PROVIDER_TIMEOUT"})
+
+    def __init__(self, bulkhead: _Bulkhead) -> None:
+        self.bulkhead = bulkhead
+        self.c = float(min(_AIMD_MAX, max(_AIMD_MIN, bulkhead.limit)))
+        self._latencies: "deque[int]" = deque(maxlen=_AIMD_WINDOW)
+        self._lock = threading.Lock()
+
+    def record_success(self, latency_ms: int) -> None:
+        with self._lock:
+            self._latencies.append(latency_ms)
+            mean = sum(self._latencies) / len(self._latencies)
+            if mean <= _AIMD_TARGET_LATENCY_MS:
+                self.c = min(_AIMD_MAX, self.c + _AIMD_ALPHA)
+            elif len(self._latencies) == self._latencies.maxlen:
+                self._decrease()
+            self.bulkhead.resize(int(self.c))
+
+    def record_failure(self, code: str) -> None:
+        if code not in self._OVERLOAD_CODES:
+            return
+        with self._lock:
+            self._decrease()
+            self.bulkhead.resize(int(self.c))
+
+    def _decrease(self) -> None:
+        self.c = max(_AIMD_MIN, self.c * _AIMD_BETA)
+        self._latencies.clear()
+
+
+_CONCURRENCY = _ConcurrencyController(_BULKHEAD)
+
+
+# ─────────────────────────────────────────────────────────────
+# Rate limiter
+# ─────────────────────────────────────────────────────────────
+
+# Some provider errors echo the quota headers, e.g. "x-ratelimit-remaining: 3"
+_RATELIMIT_REMAINING_RE = re.compile(r"x-ratelimit-remaining[\"':= ]+(\d+)", re.IGNORECASE)
+
+
+class _RateLimiter:
+    """
+    Sliding-window requests-per-minute limiter.
+
+    Delays calls locally once the window is full instead of sending them and
+    eating a 429 + retry. If a rate-limit error reports how many requests are
+    left, the effective limit is lowered to match for one window.
+    """
+
+    def __init__(self, limit: int, window_s: float = _RPM_WINDOW_S) -> None:
+        self.configured_limit = limit
+        self.limit = limit
+        self.window_s = window_s
+        self._stamps: "deque[float]" = deque()
+        self._cap_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a slot and return 0.0, or return the seconds until one frees up."""
+        now = time.monotonic()
+        with self._lock:
+            if self.limit != self.configured_limit and now >= self._cap_until:
+                self.limit = self.configured_limit
+            cutoff = now - self.window_s
+            while self._stamps and self._stamps[0] <= cutoff:
+                self._stamps.popleft()
+            if len(self._stamps) < self.limit:
+                self._stamps.append(now)
+                return 0.0
+            return max(0.0, self._stamps[0] + self.window_s - now)
+
+    def observe_error(self, exc: Exception) -> None:
+        m = _RATELIMIT_REMAINING_RE.search(str(exc))
+        if not m:
+            return
+        with self._lock:
+            self.limit = max(1, min(self.configured_limit, len(self._stamps) + int(m.group(1))))
+            self._cap_until = time.monotonic() + self.window_s
+
+
+def _rpm_limit() -> int:
+    try:
+        return max(1, int(os.getenv("GEMINI_RPM", str(_DEFAULT_RPM))))
+    except (ValueError, TypeError):
+        return _DEFAULT_RPM
+
+
+_RATE_LIMITER = _RateLimiter(_rpm_limit())
+
+
+def _wait_if_throttled(max_wait_s: float) -> bool:
+    """Block until the limiter grants a slot; False if that would take longer than max_wait_s."""
+    deadline = time.monotonic() + max_wait_s
+    while True:
+        delay = _RATE_LIMITER.reserve()
+        if delay <= 0:
+            return True
+        if time.monotonic() + delay > deadline:
+            return False
+        time.sleep(delay)
+
+
+async def _await_if_throttled(max_wait_s: float) -> bool:
+    deadline = time.monotonic() + max_wait_s
+    while True:
+        delay = _RATE_LIMITER.reserve()
+        if delay <= 0:
+            return True
+        if time.monotonic() + delay > deadline:
+            return False
+        await asyncio.sleep(delay)
+
+
 # ─────────────────────────────────────────────────────────────
 # Internal helpers
 # ─────────────────────────────────────────────────────────────
@@ -79,99 +598,165 @@ def _timeout_s() -> float:
         return _DEFAULT_TIMEOUT_S
 
 
+@functools.lru_cache(maxsize=2)
+def _build_client(api_key: str):
+    """Construct the Gemini client once per API key so its HTTP connection pool is reused."""
+    logger.info("[startup] initialising Gemini client GEMINI_MODEL=%s", _model_name())
+    from google import genai  # type: ignore
+    return genai.Client(api_key=api_key)
+
+
 def _get_client():
     """Return an initialised Gemini client, or None if unavailable."""
     api_key = os.getenv("GEMINI_API_KEY")
-    logger.info(
-        "[startup] GEMINI_API_KEY set=%s GEMINI_MODEL=%s",
-        bool(api_key),
-        _model_name(),
-    )
     if not api_key:
         return None
     try:
-        from google import genai  # type: ignore
-        return genai.Client(api_key=api_key)
-    except BaseException as e:
+        # Keyed on the key value, so rotating GEMINI_API_KEY builds a fresh client
+        return _build_client(api_key)
+    except Exception as e:
         logger.error("[startup] failed to initialise Gemini client: %s", repr(e))
         return None
 
 
 def _strip_fences(text: str) -> str:
-    text = re.sub(r"^```(?:json)?\s*", "", text.strip())
-    text = re.sub(r"\s*```$", "", text)
-    return text.strip()
+    # Plain prefix/suffix trims — no regex needed for a fixed ```json ... ``` wrapper
+    t = text.strip()
+    if t.startswith("```"):
+        t = t[3:].removeprefix("json")
+    if t.endswith("```"):
+        t = t[:-3]
+    return t.strip()
+
 
+_JSON_DECODER = json.JSONDecoder()
+_JSON_START = re.compile(r"[\[{]")
+# Candidate start positions tried before giving up — bounds work on bracket-heavy prose
+_MAX_JSON_CANDIDATES = 8
 
-def _extract_first_json(text: str) -> Optional[str]:
+
+def _as_dict(value: Any) -> Optional[Dict[str, Any]]:
+    """Accept an object, or a one-element array wrapping an object (a common model slip)."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+        return value[0]
+    return None
+
+
+def _extract_first_json(text: str) -> Optional[Dict[str, Any]]:
     """
-    Fallback extractor: find the first '{' ... '}' block in text.
-    Used when strict json.loads fails (e.g. model added preamble text).
+    Fallback extractor: decode the first JSON object or array embedded in text,
+    ignoring anything after it. Used when the strict parse fails (e.g. model
+    added preamble or trailing text).
+
+    raw_decode is the C scanner, so braces inside string values are handled
+    correctly and there is no per-character Python loop. If a '[' or '{' turns
+    out not to start valid JSON (e.g. "[Note] {...}"), the next one is tried.
     """
-    start = text.find("{")
-    if start == -1:
-        return None
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
+    for i, m in enumerate(_JSON_START.finditer(text)):
+        if i >= _MAX_JSON_CANDIDATES:
+            break
+        try:
+            result, _end = _JSON_DECODER.raw_decode(text, m.start())
+        except json.JSONDecodeError:
+            continue
+        return _as_dict(result)
     return None
 
 
 def _parse_json_robust(text: str) -> Optional[Dict[str, Any]]:
     """
     Two-stage JSON parser:
-      1. strict json.loads on the cleaned text
-      2. extract first {...} block and try again
+      1. strict parse of the cleaned text (orjson when installed)
+      2. decode the first {...} / [...] block embedded in the text
     Returns None if both fail.
     """
     cleaned = _strip_fences(text)
     try:
-        result = json.loads(cleaned)
-        if isinstance(result, dict):
+        result = _as_dict(_json_loads(cleaned))
+        if result is not None:
             return result
-    except json.JSONDecodeError:
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError both subclass it
         pass
 
-    fragment = _extract_first_json(cleaned)
-    if fragment:
-        try:
-            result = json.loads(fragment)
-            if isinstance(result, dict):
-                return result
-        except json.JSONDecodeError:
-            pass
+    return _extract_first_json(cleaned)
 
-    return None
 
+# Matches "Retry-After: 7" style hints and google.genai's "'retryDelay': '7s'"
+_RETRY_AFTER_RE = re.compile(r"retry[_-]?(?:after|delay)[\"':= ]+(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def _backoff_delay(attempt: int, exc: Exception) -> float:
+    """
+    Seconds to wait before the next attempt.
 
-def _classify_error(exc: BaseException) -> AIError:
+    Honours a provider retry hint when the error carries one; otherwise uses
+    jittered exponential backoff so concurrent workers that were rate-limited
+    together do not all retry in the same instant.
+    """
+    m = _RETRY_AFTER_RE.search(str(exc))
+    if m:
+        return min(_BACKOFF_CAP_S, float(m.group(1)))
+    delay = _BACKOFF_BASE_S * (2 ** attempt) * (1 + _BACKOFF_JITTER * random.random())
+    return min(_BACKOFF_CAP_S, delay)
+
+
+# Static errors are shared singletons rather than rebuilt on every failure.
+# Nothing mutates an AIError after construction and to_dict() copies its
+# fields, so handing the same instance to concurrent callers is safe.
+_ERR_TIMEOUT = AIError(
+    code="PROVIDER_TIMEOUT",
+    message="AI provider timed out. Please try again.",
+    retryable=True,
+    status_code=503,
+)
+_ERR_RATELIMIT = AIError(
+    code="PROVIDER_RATE_LIMIT",
+    message="AI provider rate limit reached. Try again shortly.",
+    retryable=True,
+    status_code=429,
+)
+_ERR_UNAVAILABLE = AIError(
+    code="PROVIDER_TIMEOUT",
+    message="AI provider is temporarily unavailable. Please try again.",
+    retryable=True,
+    status_code=503,
+)
+_ERR_PARSE = AIError(
+    code="PARSE_ERROR",
+    message="AI returned a response that could not be parsed. Please try again.",
+    retryable=True,
+    status_code=502,
+)
+_ERR_NOT_CONFIGURED = AIError(
+    code="AI_UNAVAILABLE",
+    message="AI features are not configured on this deployment.",
+    retryable=False,
+    status_code=503,
+)
+_ERR_CIRCUIT_OPEN = AIError(
+    code="PROVIDER_UNAVAILABLE",
+    message="AI provider is temporarily unavailable. Please try again shortly.",
+    retryable=True,
+    status_code=503,
+)
+_ERR_BUSY = AIError(
+    code="PROVIDER_BUSY",
+    message="AI is handling too many requests right now. Please try again shortly.",
+    retryable=True,
+    status_code=503,
+)
+
+
+def _classify_error(exc: Exception) -> AIError:
     s = str(exc).lower()
     if "timeout" in s or "timed out" in s or "deadline" in s:
-        return AIError(
-            code="PROVIDER_TIMEOUT",
-            message="AI provider timed out. Please try again.",
-            retryable=True,
-            status_code=503,
-        )
+        return _ERR_TIMEOUT
     if "429" in s or "quota" in s or "rate" in s:
-        return AIError(
-            code="PROVIDER_RATE_LIMIT",
-            message="AI provider rate limit reached. Try again shortly.",
-            retryable=True,
-            status_code=429,
-        )
+        return _ERR_RATELIMIT
     if "503" in s or "unavailable" in s or "overloaded" in s:
-        return AIError(
-            code="PROVIDER_TIMEOUT",
-            message="AI provider is temporarily unavailable. Please try again.",
-            retryable=True,
-            status_code=503,
-        )
+        return _ERR_UNAVAILABLE
     return AIError(
         code="INTERNAL_ERROR",
         message=f"AI provider error ({type(exc).__name__}).",
@@ -180,6 +765,90 @@ def _classify_error(exc: BaseException) -> AIError:
     )
 
 
+_BASE_CONFIG: Dict[str, Any] = {"response_mime_type": "application/json"}
+
+
+def _build_config(temperature: float, config_extra: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    config = dict(_BASE_CONFIG, temperature=temperature)
+    if config_extra:
+        config.update(config_extra)
+    return config
+
+
+def _log_snippet(text: str) -> str:
+    """Bound what a confused model or verbose provider error can push into one log line."""
+    if len(text) <= _LOG_SNIPPET_CHARS:
+        return text
+    return text[:_LOG_SNIPPET_CHARS] + "…"
+
+
+def _cache_lookup(
+    tid: str,
+    model: str,
+    prompt: str,
+    temperature: float,
+    config_extra: Optional[Dict[str, Any]],
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    cache_key = _LLMCache._key(model, prompt, temperature, config_extra)
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info(
+            "[%s] gemini cache_hit model=%s hits=%d misses=%d",
+            tid, model, _RESPONSE_CACHE.hits, _RESPONSE_CACHE.misses,
+        )
+    return cache_key, cached
+
+
+def _handle_response_text(
+    tid: str,
+    model: str,
+    raw_text: str,
+    latency_ms: int,
+    attempt: int,
+    cache_key: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], Optional[AIError], int]:
+    """Parse a completed Gemini response into the public (result, error, latency_ms) shape."""
+    result = _parse_json_robust(raw_text)
+    if result is None:
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                "[%s] gemini parse_error latency=%dms raw_snippet=%r len=%d",
+                tid, latency_ms, _log_snippet(raw_text), len(raw_text),
+            )
+        return None, _ERR_PARSE, latency_ms
+
+    logger.info(
+        "[%s] gemini ok model=%s latency=%dms attempt=%d",
+        tid, model, latency_ms, attempt,
+    )
+    if cache_key is not None:
+        _RESPONSE_CACHE.set(cache_key, result)
+    return result, None, latency_ms
+
+
+def _handle_attempt_error(
+    tid: str,
+    exc: Exception,
+    attempt: int,
+    max_retries: int,
+    latency_ms: int,
+) -> AIError:
+    _BREAKER.record_failure()
+    _RATE_LIMITER.observe_error(exc)
+    err = _classify_error(exc)
+    _CONCURRENCY.record_failure(err.code)
+    # Log full error details — status code and body are included in repr(e)
+    # for google.genai exceptions which embed the HTTP response.
+    if logger.isEnabledFor(logging.WARNING):
+        detail = str(exc)
+        logger.warning(
+            "[%s] gemini %s attempt=%d/%d latency=%dms exc_type=%s exc_detail=%r len=%d",
+            tid, err.code, attempt, max_retries, latency_ms,
+            type(exc).__name__, _log_snippet(detail), len(detail),
+        )
+    return err
+
+
 # ─────────────────────────────────────────────────────────────
 # Public API
 # ─────────────────────────────────────────────────────────────
@@ -196,6 +865,7 @@ def call_gemini_json(
     config_extra: Optional[Dict[str, Any]] = None,
     max_retries: int = 2,
     timeout_s: Optional[float] = None,
+    cacheable: bool = False,
 ) -> Tuple[Optional[Dict[str, Any]], Optional[AIError], int]:
     """
     Call Gemini with JSON output mode.
@@ -203,15 +873,29 @@ def call_gemini_json(
     Returns (result, error, latency_ms).
       - On success:        (dict, None, latency_ms)
       - On parse error:    (None, AIError(PARSE_ERROR), latency_ms)
-      - On provider error: (None, AIError(...), latency_ms) after retries
+      - On provider error: (None, AIError(...), latency_ms) after retries, where
+                           latency_ms sums every failed attempt (backoff excluded)
       - If not configured: (None, AIError(AI_UNAVAILABLE), 0)
 
     Never raises — all failure paths are returned as AIError.
 
     Retry policy:
       - Retries up to max_retries times for transient errors (timeout, 429, 503).
-      - Exponential backoff: 2 s, 4 s between attempts.
+      - Jittered exponential backoff: 2-3 s, then 4-6 s between attempts,
+        or the provider's retry-after hint when present (capped at 30 s).
       - Parse errors are NOT retried (model already responded, just badly).
+      - While the circuit breaker is open, returns PROVIDER_UNAVAILABLE
+        immediately without touching the network.
+      - Waits for the local RPM limiter; if that would exceed the call timeout,
+        returns PROVIDER_RATE_LIMIT without sending the request.
+      - If no bulkhead slot frees up within the call timeout, returns PROVIDER_BUSY.
+
+    Caching:
+      - Off by default so stochastic calls are never replayed.
+      - With cacheable=True, a successful parse is stored in an in-process
+        LRU+TTL cache; an identical later call returns (dict, None, 0).
+
+    Blocks the calling thread — from an async route use acall_gemini_json.
     """
     tid = trace_id or uuid.uuid4().hex[:8]
     client = _get_client()
@@ -219,77 +903,298 @@ def call_gemini_json(
 
     if client is None:
         logger.info("[%s] gemini unavailable (not configured)", tid)
-        return None, AIError(
-            code="AI_UNAVAILABLE",
-            message="AI features are not configured on this deployment.",
-            retryable=False,
-            status_code=503,
-        ), 0
+        return None, _ERR_NOT_CONFIGURED, 0
 
     model = _model_name()
-    config: Dict[str, Any] = {
-        "temperature": temperature,
-        "response_mime_type": "application/json",
-    }
-    if config_extra:
-        config.update(config_extra)
+    cache_key: Optional[str] = None
+    if cacheable:
+        cache_key, cached = _cache_lookup(tid, model, prompt, temperature, config_extra)
+        if cached is not None:
+            return cached, None, 0
+
+    config = _build_config(temperature, config_extra)
 
     last_err: Optional[AIError] = None
+    total_latency_ms = 0  # time spent in failed attempts, excluding backoff sleeps
     attempt = 0
-    backoff = 2  # seconds; doubles each retry
 
     while attempt <= max_retries:
+        if not _BREAKER.allow():
+            logger.info("[%s] gemini short-circuited (breaker %s)", tid, _BREAKER.state)
+            return None, last_err or _ERR_CIRCUIT_OPEN, total_latency_ms
+        try:
+            throttled = not _wait_if_throttled(call_timeout)
+            busy = not throttled and not _BULKHEAD.acquire(timeout=call_timeout)
+        except BaseException:
+            # Interrupted while queued: a half-open probe slot held here would never be
+            # released and the breaker would reject every later call
+            _BREAKER.release_probe()
+            raise
+        if throttled:
+            _BREAKER.release_probe()
+            logger.warning("[%s] gemini throttled locally rpm_limit=%d", tid, _RATE_LIMITER.limit)
+            return None, last_err or _ERR_RATELIMIT, total_latency_ms
+        if busy:
+            _BREAKER.release_probe()
+            logger.warning("[%s] gemini busy in_flight=%d limit=%d", tid, _BULKHEAD.in_flight, _BULKHEAD.limit)
+            return None, last_err or _ERR_BUSY, total_latency_ms
+
+        retry_delay: Optional[float] = None
         t0 = time.monotonic()
         try:
-            # Thread-based timeout: run generate_content in a thread with a deadline
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(
-                    client.models.generate_content,
-                    model=model,
-                    contents=prompt,
-                    config=config,
-                )
-                try:
-                    resp = future.result(timeout=call_timeout)
-                except concurrent.futures.TimeoutError:
-                    raise TimeoutError(f"Gemini call exceeded {call_timeout}s timeout")
+            # Thread-based timeout: run generate_content on the shared pool with a deadline.
+            # On timeout the HTTP call may still finish in the background; its result is dropped.
+            future = _GEMINI_EXECUTOR.submit(
+                client.models.generate_content,
+                model=model,
+                contents=prompt,
+                config=config,
+            )
+            try:
+                resp = future.result(timeout=call_timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise TimeoutError(f"Gemini call exceeded {call_timeout}s timeout")
+            except BaseException:
+                # Interrupted while waiting (e.g. shutdown) — don't leave queued work behind
+                future.cancel()
+                raise
+
+            latency_ms = int((time.monotonic() - t0) * 1000)
+            _BREAKER.record_success()
+            _CONCURRENCY.record_success(latency_ms)
+            return _handle_response_text(tid, model, resp.text or "", latency_ms, attempt, cache_key)
 
+        # Exception, not BaseException: KeyboardInterrupt / SystemExit must not be
+        # classified as provider errors and retried.
+        except Exception as e:
             latency_ms = int((time.monotonic() - t0) * 1000)
-            raw_text = resp.text or ""
+            total_latency_ms += latency_ms
+            last_err = _handle_attempt_error(tid, e, attempt, max_retries, latency_ms)
+            if attempt < max_retries and _BREAKER.state != "open":
+                retry_delay = _backoff_delay(attempt, e)
+        except BaseException:
+            # Interrupted mid-call — no outcome to record, but free a half-open probe slot
+            _BREAKER.release_probe()
+            raise
+        finally:
+            _BULKHEAD.release()
+
+        # Back off outside the bulkhead so a sleeping retry doesn't hold a slot
+        if retry_delay is not None:
+            time.sleep(retry_delay)
+        attempt += 1
+
+    return None, last_err, total_latency_ms
+
 
-            result = _parse_json_robust(raw_text)
-            if result is None:
-                logger.warning(
-                    "[%s] gemini parse_error latency=%dms raw_response=%r",
-                    tid, latency_ms, raw_text,
+async def acall_gemini_json(
+    prompt: str,
+    trace_id: Optional[str] = None,
+    temperature: float = 0.3,
+    config_extra: Optional[Dict[str, Any]] = None,
+    max_retries: int = 2,
+    timeout_s: Optional[float] = None,
+    cacheable: bool = False,
+) -> Tuple[Optional[Dict[str, Any]], Optional[AIError], int]:
+    """
+    Async twin of call_gemini_json — same arguments, same return contract.
+
+    Uses the google-genai async client (client.aio) under asyncio.wait_for, and
+    awaits between retries, so the event loop keeps serving other requests
+    while Gemini is thinking. Use this from `async def` routes.
+
+    With cacheable=True, identical calls that overlap in time share one
+    request: later callers await the first one's result rather than sending
+    their own.
+    """
+    tid = trace_id or uuid.uuid4().hex[:8]
+    client = _get_client()
+    call_timeout = timeout_s if timeout_s is not None else _timeout_s()
+
+    if client is None:
+        logger.info("[%s] gemini unavailable (not configured)", tid)
+        return None, _ERR_NOT_CONFIGURED, 0
+
+    model = _model_name()
+    cache_key: Optional[str] = None
+    if cacheable:
+        cache_key, cached = _cache_lookup(tid, model, prompt, temperature, config_extra)
+        if cached is not None:
+            return cached, None, 0
+
+    config = _build_config(temperature, config_extra)
+    send = functools.partial(
+        _acall_with_retries, tid, client, model, prompt, config, max_retries, call_timeout, cache_key,
+    )
+    if cache_key is None:
+        return await send()
+    return await _await_shared_call(tid, cache_key, send)
+
+
+async def _acall_with_retries(
+    tid: str,
+    client: Any,
+    model: str,
+    prompt: str,
+    config: Any,
+    max_retries: int,
+    call_timeout: float,
+    cache_key: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], Optional[AIError], int]:
+    """The retry loop behind acall_gemini_json, after the cache has missed."""
+    last_err: Optional[AIError] = None
+    total_latency_ms = 0  # time spent in failed attempts, excluding backoff sleeps
+    attempt = 0
+
+    while attempt <= max_retries:
+        if not _BREAKER.allow():
+            logger.info("[%s] gemini short-circuited (breaker %s)", tid, _BREAKER.state)
+            return None, last_err or _ERR_CIRCUIT_OPEN, total_latency_ms
+        try:
+            throttled = not await _await_if_throttled(call_timeout)
+            busy = not throttled and not await _BULKHEAD.acquire_async(timeout=call_timeout)
+        except BaseException:
+            # Cancelled while queued: a half-open probe slot held here would never be
+            # released and the breaker would reject every later call
+            _BREAKER.release_probe()
+            raise
+        if throttled:
+            _BREAKER.release_probe()
+            logger.warning("[%s] gemini throttled locally rpm_limit=%d", tid, _RATE_LIMITER.limit)
+            return None, last_err or _ERR_RATELIMIT, total_latency_ms
+        if busy:
+            _BREAKER.release_probe()
+            logger.warning("[%s] gemini busy in_flight=%d limit=%d", tid, _BULKHEAD.in_flight, _BULKHEAD.limit)
+            return None, last_err or _ERR_BUSY, total_latency_ms
+
+        retry_delay: Optional[float] = None
+        t0 = time.monotonic()
+        try:
+            try:
+                resp = await asyncio.wait_for(
+                    client.aio.models.generate_content(
+                        model=model,
+                        contents=prompt,
+                        config=config,
+                    ),
+                    timeout=call_timeout,
                 )
-                return None, AIError(
-                    code="PARSE_ERROR",
-                    message="AI returned a response that could not be parsed. Please try again.",
-                    retryable=True,
-                    status_code=502,
-                ), latency_ms
-
-            logger.info(
-                "[%s] gemini ok model=%s latency=%dms attempt=%d",
-                tid, model, latency_ms, attempt,
-            )
-            return result, None, latency_ms
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Gemini call exceeded {call_timeout}s timeout")
 
-        except BaseException as e:
             latency_ms = int((time.monotonic() - t0) * 1000)
-            last_err = _classify_error(e)
-            # Log full error details — status code and body are included in repr(e)
-            # for google.genai exceptions which embed the HTTP response.
-            logger.warning(
-                "[%s] gemini %s attempt=%d/%d latency=%dms exc_type=%s exc_detail=%r",
-                tid, last_err.code, attempt, max_retries, latency_ms,
-                type(e).__name__, str(e),
-            )
-            if attempt < max_retries:
-                time.sleep(backoff)
-                backoff *= 2
-            attempt += 1
+            _BREAKER.record_success()
+            _CONCURRENCY.record_success(latency_ms)
+            return _handle_response_text(tid, model, resp.text or "", latency_ms, attempt, cache_key)
+
+        # Exception, not BaseException: CancelledError must propagate so the
+        # request can be torn down when the client disconnects.
+        except Exception as e:
+            latency_ms = int((time.monotonic() - t0) * 1000)
+            total_latency_ms += latency_ms
+            last_err = _handle_attempt_error(tid, e, attempt, max_retries, latency_ms)
+            if attempt < max_retries and _BREAKER.state != "open":
+                retry_delay = _backoff_delay(attempt, e)
+        except BaseException:
+            # Cancelled mid-call — no outcome to record, but free a half-open probe slot
+            _BREAKER.release_probe()
+            raise
+        finally:
+            _BULKHEAD.release()
+
+        if retry_delay is not None:
+            await asyncio.sleep(retry_delay)
+        attempt += 1
+
+    return None, last_err, total_latency_ms
+
+
+async def astream_gemini_json(
+    prompt: str,
+    trace_id: Optional[str] = None,
+    temperature: float = 0.3,
+    config_extra: Optional[Dict[str, Any]] = None,
+    timeout_s: Optional[float] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of acall_gemini_json for routes that render partial output.
+
+    Yields ("text", chunk) for each piece of model output as it arrives, then
+    exactly one ("result", (result, error, latency_ms)) with the same contract
+    as acall_gemini_json once the stream ends.
 
-    return None, last_err, 0
+    Goes through the same breaker, rate limiter and bulkhead, but never retries
+    (text already handed to the caller can't be taken back) and never caches.
+    timeout_s bounds the wait for each chunk rather than the whole response.
+    """
+    tid = trace_id or uuid.uuid4().hex[:8]
+    client = _get_client()
+    call_timeout = timeout_s if timeout_s is not None else _timeout_s()
+
+    if client is None:
+        logger.info("[%s] gemini unavailable (not configured)", tid)
+        yield "result", (None, _ERR_NOT_CONFIGURED, 0)
+        return
+    if not _BREAKER.allow():
+        logger.info("[%s] gemini short-circuited (breaker %s)", tid, _BREAKER.state)
+        yield "result", (None, _ERR_CIRCUIT_OPEN, 0)
+        return
+    try:
+        throttled = not await _await_if_throttled(call_timeout)
+        busy = not throttled and not await _BULKHEAD.acquire_async(timeout=call_timeout)
+    except BaseException:
+        # Cancelled while queued: free a half-open probe slot, as in _acall_with_retries
+        _BREAKER.release_probe()
+        raise
+    if throttled:
+        _BREAKER.release_probe()
+        logger.warning("[%s] gemini throttled locally rpm_limit=%d", tid, _RATE_LIMITER.limit)
+        yield "result", (None, _ERR_RATELIMIT, 0)
+        return
+    if busy:
+        _BREAKER.release_probe()
+        logger.warning("[%s] gemini busy in_flight=%d limit=%d", tid, _BULKHEAD.in_flight, _BULKHEAD.limit)
+        yield "result", (None, _ERR_BUSY, 0)
+        return
+
+    model = _model_name()
+    parts: List[str] = []
+    t0 = time.monotonic()
+    try:
+        try:
+            stream = await asyncio.wait_for(
+                client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=prompt,
+                    config=_build_config(temperature, config_extra),
+                ),
+                timeout=call_timeout,
+            )
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=call_timeout)
+                except StopAsyncIteration:
+                    break
+                text = chunk.text or ""
+                if text:
+                    parts.append(text)
+                    yield "text", text
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Gemini stream stalled for {call_timeout}s")
+    except Exception as e:
+        latency_ms = int((time.monotonic() - t0) * 1000)
+        outcome = (None, _handle_attempt_error(tid, e, 0, 0, latency_ms), latency_ms)
+    except BaseException:
+        # Caller went away mid-stream (aclose / cancellation): free a half-open probe slot
+        _BREAKER.release_probe()
+        raise
+    else:
+        latency_ms = int((time.monotonic() - t0) * 1000)
+        _BREAKER.record_success()
+        _CONCURRENCY.record_success(latency_ms)
+        outcome = _handle_response_text(tid, model, "".join(parts), latency_ms, 0, None)
+    finally:
+        _BULKHEAD.release()
+    yield "result", outcome
@@ -33,6 +33,21 @@ UCAS facts:
 - UCAS deadline: typically 15 January for most universities; 15 October for Oxford/Cambridge/medicine.
 """
 
+# Everything except the student\'s question is static, so it goes first: Gemini\'s
+# implicit prefix cache only matches identical leading tokens across requests.
+_FAQ_PROMPT_PREFIX = (
+    "You are a helpful UCAS admissions assistant for the offr tool.\\n\\n"
+    f"Context about offr and UK admissions:\\n{OFFR_CONTEXT}\\n\\n"
+    "Return ONLY valid JSON (no markdown, no code fences):\\n"
+    \'{"answer": "<clear, honest, specific answer in 2-4 sentences>", "follow_up_questions": ["<related question 1>", "<related question 2>"]}\\n\\n\'
+    "Rules:\\n"
+    "- answer ≤ 80 words, factual, grounded in the context above\\n"
+    "- follow_up_questions: 2 short questions the student might want to ask next\\n"
+    "- If you don\'t know, say so honestly — don\'t invent statistics or policies\\n"
+    "- Be friendly but concise\\n\\n"
+    "Student question: "
+)
+
 
 class AskFAQRequest(BaseModel):
     question: str
@@ -62,20 +77,9 @@ async def ask_faq(payload: AskFAQRequest):
     if not is_gemini_available():
         return _ask_faq_fallback()
 
-    prompt = (
-        f"You are a helpful UCAS admissions assistant for the offr tool.\\n\\n"
-        f"Context about offr and UK admissions:\\n{OFFR_CONTEXT}\\n\\n"
-        f"Student question: {question}\\n\\n"
-        "Return ONLY valid JSON (no markdown, no code fences):\\n"
-        \'{"answer": "<clear, honest, specific answer in 2-4 sentences>", "follow_up_questions": ["<related question 1>", "<related question 2>"]}\\'\\n\\n"
-        "Rules:\\n"
-        "- answer ≤ 80 words, factual, grounded in the context above\\n"
-        "- follow_up_questions: 2 short questions the student might want to ask next\\n"
-        "- If you don\'t know, say so honestly — don\'t invent statistics or policies\\n"
-        "- Be friendly but concise"
-    )
-
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid, temperature=0.3)
+    prompt = _FAQ_PROMPT_PREFIX + question
+
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid, temperature=0.3, cacheable=True)
 
     if err or result is None:
         return _ask_faq_fallback()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import math
@@ -7,19 +8,28 @@ import os
 import re
 import time
 import uuid
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger("offr.api")
 
-import pandas as pd
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from api.ai_service import AIError, call_gemini_json, is_gemini_available
+try:
+    import orjson
+except ImportError:  # optional speed-up — prompt_json falls back to the stdlib encoder
+    orjson = None
+
+from api.ai_service import AIError, acall_gemini_json, astream_gemini_json, is_gemini_available
+
+if TYPE_CHECKING:  # bound for real by _import_data_stack() on the first load_df()
+    import numpy as np
+    import pandas as pd
 
 app = FastAPI(
     title="offr API",
@@ -37,12 +47,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reported in response meta. Read once — the env doesn't change within a process —
+# with the same default ai_service falls back to when it picks the model.
+_GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
 # ─────────────────────────────────────────────────────────────
 # Data
 # ─────────────────────────────────────────────────────────────
 
 DATA_DIR = Path(__file__).parent / "data"
 _DF: Optional[pd.DataFrame] = None
+# course_id → cleaned row dict, built alongside _DF so get_row is a hash lookup
+_ROW_INDEX: Dict[str, Dict[str, Any]] = {}
+# course_id → split ps_expected_signals, so PS prompts don't re-split per request
+_SIGNALS_INDEX: Dict[str, List[str]] = {}
+# course_id → position in the _SCORE_ARRAYS columns below (same order as _ROW_INDEX)
+_SCORE_POS: Dict[str, int] = {}
+# Per-course NumPy columns (ids, names, parsed offer thresholds), so /assess_batch and
+# suggest_alternatives work on whole arrays instead of looping rows
+_SCORE_ARRAYS: Dict[str, np.ndarray] = {}
+# /courses listing rows (one dict per _DF row, NaN already None), ready to serialise
+_COURSES_RECORDS: List[Dict[str, Any]] = []
+# Uppercased university_id → _DF row positions, so /courses gathers one university directly
+_UNIV_ROWS: Dict[str, np.ndarray] = {}
+# faculty → positions in _SCORE_ARRAYS, so suggest_alternatives only looks at one faculty
+_FACULTY_POS: Dict[str, np.ndarray] = {}
+_NO_ROWS: Optional[np.ndarray] = None  # empty position array, made alongside _UNIV_ROWS
+# /universities payload and /health's distinct-university count, fixed once the CSV is loaded
+_UNIVERSITIES: List[Dict[str, str]] = []
+_UNIVERSITY_COUNT = 0
+# Lowercased "course_name\x1ffaculty" per _DF row — one substring pass serves both search fields
+_SEARCH_BLOB: Optional[pd.Series] = None
+# normalize_course_key(course_name) per _DF row, and key → _DF row positions for /unique_courses
+_COURSE_KEYS: Optional[pd.Series] = None
+_COURSE_KEY_ROWS: Dict[str, np.ndarray] = {}
+# Unfiltered /unique_courses payload, built once in load_df
+_UNIQUE_COURSES: List[Dict[str, Any]] = []
+# One entry per distinct course_name for /suggest's interest scoring, grouped once at load
+_INTEREST_COURSES: List[Dict[str, Any]] = []
+_UNIQUE_COURSE_COLUMNS = ["course_name", "university_id", "faculty", "degree_type", "min_requirements"]
+_COURSES_VIEW_COLUMNS = [
+    "university_id", "course_id", "course_name", "faculty",
+    "degree_type", "estimated_annual_cost_international", "min_requirements",
+]
 
 UNIVERSITY_NAME_MAP = {
     "KCL":  "King's College London",
@@ -92,6 +139,14 @@ PS_LIGHT_UNIS: set = {
     "EXE",   # University of Exeter
 }
 
+# Uppercase university_id → tier, derived from the sets above. Built
+# light → moderate → heavy so the heavier tier wins if an id is listed twice.
+_UID_TO_TIER: Dict[str, str] = {
+    **{u: "light" for u in PS_LIGHT_UNIS},
+    **{u: "moderate" for u in PS_MODERATE_UNIS},
+    **{u: "heavy" for u in PS_HEAVY_UNIS},
+}
+
 # Name-to-ID lookup used by /ps-evaluate when target_university is a plain name
 PS_UNI_NAME_TO_ID: Dict[str, str] = {
     "oxford":                    "OXF",
@@ -125,27 +180,17 @@ PS_UNI_NAME_TO_ID: Dict[str, str] = {
     "university of exeter":      "EXE",
 }
 
-PS_SCORE_IMPACT: Dict[Tuple[str, str], int] = {
-    ("heavy",    "EXCEPTIONAL"): +12,
-    ("heavy",    "STRONG"):       +6,
-    ("heavy",    "OK"):           -8,
-    ("heavy",    "WEAK"):        -20,
-    ("moderate", "EXCEPTIONAL"):  +8,
-    ("moderate", "STRONG"):       +4,
-    ("moderate", "OK"):           -4,
-    ("moderate", "WEAK"):        -12,
-    ("light",    "EXCEPTIONAL"):  +5,
-    ("light",    "STRONG"):       +2,
-    ("light",    "OK"):            0,
-    ("light",    "WEAK"):         -5,
+# tier → PS band → score delta. Nested rather than tuple-keyed so a lookup
+# needs no key tuple; every tier get_ps_tier can return has a row.
+PS_SCORE_IMPACT: Dict[str, Dict[str, int]] = {
+    "heavy":    {"EXCEPTIONAL": +12, "STRONG": +6, "OK": -8, "WEAK": -20},
+    "moderate": {"EXCEPTIONAL":  +8, "STRONG": +4, "OK": -4, "WEAK": -12},
+    "light":    {"EXCEPTIONAL":  +5, "STRONG": +2, "OK":  0, "WEAK":  -5},
 }
 
 
 def get_ps_tier(university_id: str) -> str:
-    uid = (university_id or "").upper()
-    if uid in PS_HEAVY_UNIS:    return "heavy"
-    if uid in PS_MODERATE_UNIS: return "moderate"
-    return "light"
+    return _UID_TO_TIER.get((university_id or "").upper(), "light")
 
 
 def resolve_uni_id(raw: Optional[str]) -> Optional[str]:
@@ -171,8 +216,8 @@ def apply_ps_score(
     if not ps_band_val:
         return base_score, None
     tier  = get_ps_tier(university_id)
-    delta = PS_SCORE_IMPACT.get((tier, ps_band_val.upper()), 0)
-    new_score = max(0, min(100, base_score + delta))
+    delta = PS_SCORE_IMPACT[tier].get(ps_band_val.upper(), 0)
+    new_score = _clamp100(base_score + delta)
     note: Optional[str] = None
     if delta <= -12:
         note = (f"Your personal statement significantly weakens this application "
@@ -187,7 +232,8 @@ def apply_ps_score(
     return new_score, note
 
 
-# Gemini helpers moved to api/ai_service.py — use call_gemini_json() and is_gemini_available()
+# Gemini helpers moved to api/ai_service.py — use call_gemini_json() (or acall_gemini_json()
+# from async routes) and is_gemini_available()
 
 
 def safe_detail(msg: str, e: Exception) -> str:
@@ -198,6 +244,28 @@ def safe_detail(msg: str, e: Exception) -> str:
 # Utilities
 # ─────────────────────────────────────────────────────────────
 
+# Patterns used on the request path, compiled once at import
+_RE_INT           = re.compile(r"-?\d+")
+_RE_MONEY         = re.compile(r"(\d[\d,]{3,})")
+_RE_SIGNAL_SPLIT  = re.compile(r"[;\n\.]+")
+_RE_WS            = re.compile(r"\s+")
+_RE_NON_ALNUM     = re.compile(r"[^a-z0-9\s]")
+_RE_SUBJECT_JUNK  = re.compile(r"[^a-z0-9\s\+\-\*]")
+_RE_IB            = re.compile(r"\bIB\b[^A-Za-z0-9]{0,10}(\d{2})\b", re.IGNORECASE)
+_RE_2DIGIT        = re.compile(r"\b(\d{2})\b")
+_RE_ALEVEL_LABEL  = re.compile(r"A[-\s]?[Ll]evel[s]?\s*[:\s=]+\s*([A-Ea-e\*]{3,5})")
+_RE_GRADE_KEYWORD = re.compile(r"(?:offer|grades?|require[sd]?|typical|minimum)[^A-Za-z]{0,10}([A-Ea-e\*]{3,5})\b", re.IGNORECASE)
+_RE_BARE_GRADE    = re.compile(r"\b([A-Ea-e][A-Ea-e\*]{2,4})\b")
+# Only grade letters and stars, with at least three letters. Each letter is one
+# grade token (a trailing * just upgrades A), so this is the same test as
+# "tokenises to 3 grades once the list is cut to three".
+_RE_VALID_OFFER   = re.compile(r"\**(?:[A-E]\**){3,}")
+_RE_GRADES        = re.compile(r"A\*|[A-E]")
+_RE_MATH_WORD     = re.compile(r"\bmath")
+_RE_PROPER        = re.compile(r"\b[A-Z][a-z]{2,}\b")
+_RE_WORDS         = re.compile(r"[A-Za-z']+")
+
+
 def nan_to_none(x: Any) -> Any:
     try:
         if x is None:
@@ -209,15 +277,44 @@ def nan_to_none(x: Any) -> Any:
     return x
 
 
+def prompt_json(obj: Any, indent: bool = False) -> str:
+    """
+    JSON for embedding in Gemini prompts. orjson when installed; the stdlib
+    fallback is configured to produce the same compact, unescaped-UTF-8 text.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_response(content: Any) -> Response:
+    """
+    Already-JSON-safe content (plain dicts/lists/str/int/None) straight to the
+    wire, skipping FastAPI's jsonable_encoder walk. orjson when installed.
+    """
+    if orjson is not None:
+        return Response(orjson.dumps(content), media_type="application/json")
+    return JSONResponse(content)
+
+
+def _clamp100(score: int) -> int:
+    return 0 if score < 0 else 100 if score > 100 else score
+
+
 def clean_str(x: Any) -> str:
     return ("" if x is None else str(x)).strip()
 
 
 def to_int(v: Any) -> Optional[int]:
     if v is None: return None
+    if type(v) is int: return v  # precast columns; excludes bool, which str()s to "True"
     s = str(v).strip()
     if not s: return None
-    m = re.search(r"-?\d+", s.replace(",", ""))
+    # Bare digits are the common case — skip the regex for them
+    if s.isascii() and s.isdigit(): return int(s)
+    m = _RE_INT.search(s.replace(",", ""))
     return int(m.group(0)) if m else None
 
 
@@ -225,23 +322,22 @@ def to_money(v: Any) -> Optional[int]:
     if v is None: return None
     s = str(v).strip()
     if not s: return None
-    m = re.search(r"(\d[\d,]{3,})", s)
+    # _RE_MONEY needs at least 4 chars, so shorter bare digits still fall through to None
+    if len(s) >= 4 and s.isascii() and s.isdigit(): return int(s)
+    m = _RE_MONEY.search(s)
     return int(m.group(1).replace(",", "")) if m else None
 
 
 def split_signals(text: str) -> List[str]:
     t = clean_str(text)
     if not t: return []
-    parts = re.split(r"[;\n\.]+", t)
-    out = [p.strip(" -•\t").strip() for p in parts if p.strip()]
-    seen: set = set()
-    uniq: List[str] = []
-    for s in out:
-        k = s.lower()
-        if k not in seen:
-            seen.add(k)
-            uniq.append(s)
-    return uniq
+    # Dedupe case-insensitively, keeping the first spelling and the original order
+    uniq: Dict[str, str] = {}
+    for p in _RE_SIGNAL_SPLIT.split(t):
+        if not p.strip(): continue
+        s = p.strip(" -•\t").strip()
+        uniq.setdefault(s.lower(), s)
+    return list(uniq.values())
 
 
 # ─────────────────────────────────────────────────────────────
@@ -269,36 +365,272 @@ def ensure_university_id(df: pd.DataFrame) -> pd.DataFrame:
     if "course_id" not in df.columns:
         raise RuntimeError("Data must include course_id or university_id column")
     df = df.copy()
-    df["university_id"] = df["course_id"].astype(str).apply(
-        lambda x: x.split("_", 1)[0] if "_" in x else x[:6]
-    )
+    # Prefix before the first "_", or the first 6 chars when there is none
+    ids = df["course_id"].astype(str)
+    parts = ids.str.partition("_")
+    df["university_id"] = parts[0].where(parts[1] == "_", ids.str.slice(0, 6))
+    return df
+
+
+# Numeric columns parsed once at load rather than on every row access.
+# Kept as object dtype so missing values stay None instead of becoming NaN floats.
+_INT_COLUMNS = ("min_points_home", "intl_buffer_points")
+_MONEY_COLUMNS = ("estimated_annual_cost_international",)
+
+
+def precast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    for col, conv in [(c, to_int) for c in _INT_COLUMNS] + [(c, to_money) for c in _MONEY_COLUMNS]:
+        if col in df.columns:
+            df[col] = pd.Series([conv(nan_to_none(v)) for v in df[col]], index=df.index, dtype=object)
     return df
 
 
+def build_row_index(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    index: Dict[str, Dict[str, Any]] = {}
+    cols = list(df.columns)
+    cid_idx = cols.index("course_id")
+    # Plain tuples — no per-row Series or intermediate records list
+    for row in df.itertuples(index=False, name=None):
+        # First occurrence wins, matching the old boolean-mask lookup
+        if row[cid_idx] not in index:
+            index[row[cid_idx]] = {k: nan_to_none(v) for k, v in zip(cols, row)}
+    return index
+
+
+def build_score_arrays(index: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, np.ndarray]]:
+    """
+    Parse each course's IB minimum, intl buffer and A-level offer once, into
+    column arrays for score_ib_batch / score_alevel_batch / suggest_alternatives.
+    Missing values are flagged in has_home_min / has_req rather than encoded
+    as sentinels.
+    """
+    n = len(index)
+    course_ids   = np.empty(n, dtype=object)
+    course_names = np.empty(n, dtype=object)
+    faculties    = np.empty(n, dtype=object)
+    alevel_offer = np.empty(n, dtype=object)
+    home_min     = np.zeros(n, dtype=np.int64)
+    has_home_min = np.zeros(n, dtype=bool)
+    intl_buffer  = np.zeros(n, dtype=np.int64)
+    req_ranks    = np.zeros((n, 3), dtype=np.int64)
+    has_req      = np.zeros(n, dtype=bool)
+    pos: Dict[str, int] = {}
+    for i, (cid, rec) in enumerate(index.items()):
+        pos[cid] = i
+        course_ids[i], course_names[i], faculties[i] = cid, str(rec.get("course_name")), rec.get("faculty")
+        hm = extract_ib_min_points([
+            clean_str(rec.get("min_points_home")),
+            clean_str(rec.get("min_requirements")),
+            clean_str(rec.get("typical_offer")),
+        ])
+        if hm is not None:
+            home_min[i], has_home_min[i] = hm, True
+        intl_buffer[i] = to_int(rec.get("intl_buffer_points")) or 0
+        req = extract_alevel_offer([
+            clean_str(rec.get("typical_offer")),
+            clean_str(rec.get("min_requirements")),
+        ])
+        alevel_offer[i] = req
+        grades = _parse_offer_pattern(req) if req else ()
+        if len(grades) == 3:
+            req_ranks[i] = [_GRADE_RANK[g] for g in grades]
+            has_req[i]   = True
+    return pos, {
+        "course_id": course_ids, "course_name": course_names, "faculty": faculties,
+        "home_min": home_min, "has_home_min": has_home_min, "alevel_offer": alevel_offer,
+        "intl_buffer": intl_buffer, "req_ranks": req_ranks, "has_req": has_req,
+    }
+
+
+def build_search_blob(df: pd.DataFrame) -> pd.Series:
+    # \x1f (unit separator) can't come from a typed query, so matches never span the two fields
+    # fillna first: under pandas 3 astype(str) keeps NaN, and one NaN field would
+    # make the whole concatenated blob NaN (never matching)
+    blob = df["course_name"].fillna("").astype(str).str.lower()
+    if "faculty" in df.columns:
+        blob = blob + "\x1f" + df["faculty"].fillna("").astype(str).str.lower()
+    return blob
+
+
+def build_universities(df: pd.DataFrame) -> List[Dict[str, str]]:
+    ids = sorted({clean_str(x) for x in df["university_id"].fillna("").tolist() if clean_str(x)})
+    return [
+        {"university_id": uid, "university_name": UNIVERSITY_NAME_MAP.get(uid, uid)}
+        for uid in ids
+    ]
+
+
+def build_unique_courses(view: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Aggregate _DF rows (a _UNIQUE_COURSE_COLUMNS slice) into one record per
+    course key, for /unique_courses.
+    """
+    # Reindex first: assigning a longer Series to an empty frame would adopt its rows
+    view = view.assign(course_key=_COURSE_KEYS.reindex(view.index))
+    records: Dict[str, Dict[str, Any]] = {}
+    for name, uni_id, fac, deg, min_req, key in view.itertuples(index=False, name=None):
+        name = clean_str(name)
+        if not name:
+            continue
+        uni_id = clean_str(uni_id)
+        fac = clean_str(fac)
+        deg = clean_str(deg)
+        min_req = clean_str(min_req)
+
+        if key not in records:
+            records[key] = {
+                "course_key": key,
+                "course_name": name,
+                "universities": [],
+                "faculties": set(),
+                "degree_types": set(),
+                "min_entry_examples": [],
+            }
+
+        rec = records[key]
+        if uni_id:
+            uni_name = UNIVERSITY_NAME_MAP.get(uni_id, uni_id)
+            if not any(u["university_id"] == uni_id for u in rec["universities"]):
+                rec["universities"].append({"university_id": uni_id, "university_name": uni_name})
+        if fac:
+            rec["faculties"].add(fac)
+        if deg:
+            rec["degree_types"].add(deg)
+        if min_req:
+            if len(rec["min_entry_examples"]) < 3 and min_req not in rec["min_entry_examples"]:
+                rec["min_entry_examples"].append(min_req)
+
+    out: List[Dict[str, Any]] = []
+    for key, rec in records.items():
+        faculties = sorted(rec["faculties"])
+        degree_types = sorted(rec["degree_types"])
+        min_entry_hint = None
+        if rec["min_entry_examples"]:
+            # Just show one short string as a hint; keep it honest and simple.
+            min_entry_hint = rec["min_entry_examples"][0]
+        out.append(
+            {
+                "course_key": rec["course_key"],
+                "course_name": rec["course_name"],
+                "universities_count": len(rec["universities"]),
+                "universities": rec["universities"],
+                "faculties": faculties,
+                "degree_types": degree_types,
+                "min_entry_hint": min_entry_hint,
+            }
+        )
+
+    # Sort by course_name for a calm, predictable list.
+    out.sort(key=lambda x: x["course_name"])
+    return out
+
+
+def build_interest_courses(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    grp = df.groupby("course_name", as_index=False).agg(
+        faculty=("faculty", "first"),
+        universities_count=("university_id", "nunique"),
+        faculties=("faculty", lambda x: list({str(v) for v in x if pd.notna(v)})),
+    )
+    courses = [
+        {
+            "course_name":        str(name),
+            "name_lc":            str(name).lower().strip(),
+            "faculty":            str(fac or ""),
+            "universities_count": int(count or 1),
+            "faculties":          facs or [],
+        }
+        for name, fac, count, facs in grp[
+            ["course_name", "faculty", "universities_count", "faculties"]
+        ].itertuples(index=False, name=None)
+    ]
+    for c in courses:
+        c["text_lc"] = f"{c['course_name']} {c['faculty']}".lower()
+        c["keyword_hits"] = interest_keyword_hits(c["text_lc"])
+    return courses
+
+
+def _import_data_stack() -> None:
+    """
+    numpy + pandas take ~300 ms to import — most of a cold start — and only the
+    course-data routes use them. Binding them as module globals on the first
+    load_df() keeps that cost off the Gemini-only routes.
+    """
+    global np, pd
+    import numpy as np
+    import pandas as pd
+
+
 def load_df() -> pd.DataFrame:
-    global _DF
+    global _DF, _NO_ROWS, _UNIVERSITIES, _UNIVERSITY_COUNT, _ROW_INDEX, _SIGNALS_INDEX, _COURSES_RECORDS, _SCORE_POS, _SCORE_ARRAYS, _UNIV_ROWS, _FACULTY_POS, _SEARCH_BLOB, _INTEREST_COURSES, _COURSE_KEYS, _COURSE_KEY_ROWS, _UNIQUE_COURSES
     if _DF is None:
         if not DATA_DIR.exists():
             raise RuntimeError(f"Data directory not found: {DATA_DIR}")
         path = pick_data_path()
-        _DF = pd.read_csv(path, dtype=str, engine="python")
-        _DF = ensure_university_id(_DF)
+        _import_data_stack()
+        df = pd.read_csv(path, dtype=str, engine="c")
+        df = ensure_university_id(df)
+        df = precast_numeric(df)
+        _ROW_INDEX = build_row_index(df)
+        _SIGNALS_INDEX = {
+            cid: split_signals(clean_str(rec.get("ps_expected_signals")))
+            for cid, rec in _ROW_INDEX.items()
+        }
+        _SCORE_POS, _SCORE_ARRAYS = build_score_arrays(_ROW_INDEX)
+        _NO_ROWS = np.empty(0, dtype=np.intp)
+        _UNIV_ROWS = df.groupby(df["university_id"].astype(str).str.upper(), sort=False).indices
+        _FACULTY_POS = pd.Series(_SCORE_ARRAYS["faculty"]).groupby(_SCORE_ARRAYS["faculty"], sort=False).indices
+        _SEARCH_BLOB = build_search_blob(df)
+        _COURSE_KEYS = df["course_name"].map(normalize_course_key)
+        _COURSE_KEY_ROWS = _COURSE_KEYS.groupby(_COURSE_KEYS, sort=False).indices
+        if set(_UNIQUE_COURSE_COLUMNS) <= set(df.columns):
+            _UNIQUE_COURSES = build_unique_courses(df[_UNIQUE_COURSE_COLUMNS])
+        _INTEREST_COURSES = build_interest_courses(df)
+        _UNIVERSITIES = build_universities(df)
+        _UNIVERSITY_COUNT = int(df["university_id"].nunique()) if "university_id" in df.columns else 0
+        view = df[[c for c in _COURSES_VIEW_COLUMNS if c in df.columns]]
+        _COURSES_RECORDS = view.where(pd.notna(view), None).to_dict(orient="records")
+        _DF = df
     return _DF
 
 
 def get_row(course_id: str) -> Dict[str, Any]:
-    df = load_df()
-    row = df[df["course_id"] == course_id]
-    if row.empty:
+    """Cleaned row for course_id. The dict is shared across requests — treat it as read-only."""
+    load_df()
+    rec = _ROW_INDEX.get(course_id)
+    if rec is None:
         raise HTTPException(status_code=404, detail=f"course_id not found: {course_id}")
-    rec = row.iloc[0].to_dict()
-    if "min_points_home"    in rec: rec["min_points_home"]    = to_int(rec.get("min_points_home"))
-    if "intl_buffer_points" in rec: rec["intl_buffer_points"] = to_int(rec.get("intl_buffer_points"))
-    if "estimated_annual_cost_international" in rec:
-        rec["estimated_annual_cost_international"] = to_money(rec.get("estimated_annual_cost_international"))
-    return {k: nan_to_none(v) for k, v in rec.items()}
+    return rec
+
+
+def course_signals(course_row: Dict[str, Any]) -> List[str]:
+    """Expected PS signals for a row from get_row — shared list, don't mutate."""
+    signals = _SIGNALS_INDEX.get(course_row.get("course_id"))
+    if signals is None:
+        signals = split_signals(clean_str(course_row.get("ps_expected_signals")))
+    return signals
+
+
+def course_offers(course_row: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+    """(IB home minimum, A-level typical offer) for a row from get_row, parsed at load time."""
+    i = _SCORE_POS.get(course_row.get("course_id"))
+    if i is None:
+        return (
+            extract_ib_min_points([
+                clean_str(course_row.get("min_points_home")),
+                clean_str(course_row.get("min_requirements")),
+                clean_str(course_row.get("typical_offer")),
+            ]),
+            extract_alevel_offer([
+                clean_str(course_row.get("typical_offer")),
+                clean_str(course_row.get("min_requirements")),
+            ]),
+        )
+    home_min = int(_SCORE_ARRAYS["home_min"][i]) if _SCORE_ARRAYS["has_home_min"][i] else None
+    return home_min, _SCORE_ARRAYS["alevel_offer"][i]
 
 
+# /unique_courses re-keys every course name on each call; the names are static.
+@functools.lru_cache(maxsize=1024)
 def normalize_course_key(name: str) -> str:
     """
     Normalise a course name into a stable key for deduping across universities.
@@ -306,9 +638,9 @@ def normalize_course_key(name: str) -> str:
     """
     base = clean_str(name).lower()
     # keep letters, numbers and spaces; drop everything else
-    base = re.sub(r"[^a-z0-9\s]", " ", base)
-    base = re.sub(r"\s+", " ", base).strip()
-    return re.sub(r"\s+", "-", base)
+    base = _RE_NON_ALNUM.sub(" ", base)
+    base = _RE_WS.sub(" ", base).strip()
+    return _RE_WS.sub("-", base)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -316,15 +648,21 @@ def normalize_course_key(name: str) -> str:
 # ─────────────────────────────────────────────────────────────
 
 def extract_ib_min_points(texts: List[str]) -> Optional[int]:
-    joined = " | ".join([t for t in texts if t])
+    return _ib_min_points_in(" | ".join([t for t in texts if t]))
+
+
+# Offer text comes from static course columns, so the same strings are parsed
+# on every /assess and every suggest_alternatives pass — memoise on the joined text.
+@functools.lru_cache(maxsize=4096)
+def _ib_min_points_in(joined: str) -> Optional[int]:
     # Try explicit "IB: 38" or "IB=38" style first
-    m = re.search(r"\bIB\b[^A-Za-z0-9]{0,10}(\d{2})\b", joined, flags=re.IGNORECASE)
+    m = _RE_IB.search(joined)
     if m:
         v = int(m.group(1))
         if 24 <= v <= 45:
             return v
     # Fall back: any 2-digit number in valid IB range
-    for m in re.finditer(r"\b(\d{2})\b", joined):
+    for m in _RE_2DIGIT.finditer(joined):
         v = int(m.group(1))
         if 24 <= v <= 45:
             return v
@@ -338,24 +676,27 @@ def extract_alevel_offer(texts: List[str]) -> Optional[str]:
       'AAA', 'A*AA', 'A*A*A', 'A-Levels: AAA', 'AAB at A-level',
       'typical offer of A*AA', 'grades AAB', 'offer: A*AA', etc.
     """
-    joined = " | ".join([t for t in texts if t])
+    return _alevel_offer_in(" | ".join([t for t in texts if t]))
+
 
+@functools.lru_cache(maxsize=4096)
+def _alevel_offer_in(joined: str) -> Optional[str]:
     # 1. Explicit A-level label with grade immediately after
-    m = re.search(r"A[-\s]?[Ll]evel[s]?\s*[:\s=]+\s*([A-Ea-e\*]{3,5})", joined)
+    m = _RE_ALEVEL_LABEL.search(joined)
     if m:
         result = _validate_grade_string(m.group(1))
         if result:
             return result
 
     # 2. Grade string preceded by common keywords
-    m = re.search(r"(?:offer|grades?|require[sd]?|typical|minimum)[^A-Za-z]{0,10}([A-Ea-e\*]{3,5})\b", joined, flags=re.IGNORECASE)
+    m = _RE_GRADE_KEYWORD.search(joined)
     if m:
         result = _validate_grade_string(m.group(1))
         if result:
             return result
 
     # 3. Bare grade pattern — 3-5 chars made of A/B/C/D/E/* at a word boundary
-    for m in re.finditer(r"\b([A-Ea-e][A-Ea-e\*]{2,4})\b", joined):
+    for m in _RE_BARE_GRADE.finditer(joined):
         result = _validate_grade_string(m.group(1))
         if result:
             return result
@@ -366,33 +707,55 @@ def extract_alevel_offer(texts: List[str]) -> Optional[str]:
 def _validate_grade_string(raw: str) -> Optional[str]:
     """Uppercase and validate — must parse to exactly 3 valid A-level grades."""
     s = raw.upper().replace(" ", "")
-    if not re.fullmatch(r"[A-E\*]+", s):
-        return None
-    grades = _parse_offer_pattern(s)
-    if len(grades) == 3:
-        return s
-    return None
+    return s if _RE_VALID_OFFER.fullmatch(s) else None
 
 
+# Every token normalize_subject dispatches on, found in one findall pass.
+# Tokens never overlap in a way that hides a higher-priority one, so
+# collecting them all and checking priority below matches the old cascade.
+_RE_SUBJECT_TOKENS = re.compile(
+    r"analysis and approaches|math aa|aa hl|\bmath|\becon|english|physics|chem|\bbio|psych|computer|science"
+)
+_MATH_TOKENS = frozenset({"analysis and approaches", "math aa", "aa hl", "math"})
+# Checked in priority order after maths. "further math" always also hits \bmath,
+# so it normalises to math — the A-level gate accepts either.
+_SUBJECT_BY_TOKEN: List[Tuple[str, str]] = [
+    ("econ",    "economics"),
+    ("english", "english"),
+    ("physics", "physics"),
+    ("chem",    "chemistry"),
+    ("bio",     "biology"),
+    ("psych",   "psychology"),
+]
+
+
+@functools.lru_cache(maxsize=2048)
 def normalize_subject(s: str) -> str:
     t = s.lower().replace("&", "and")
-    t = re.sub(r"[^a-z0-9\s\+\-\*]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    if "analysis and approaches" in t or "math aa" in t or "aa hl" in t:
+    t = _RE_SUBJECT_JUNK.sub(" ", t)
+    t = _RE_WS.sub(" ", t).strip()
+    found = set(_RE_SUBJECT_TOKENS.findall(t))
+    if not found:
+        return t
+    if found & _MATH_TOKENS:
         return "math_hl" if ("hl" in t or "higher level" in t) else "math"
-    if re.search(r"\bmath", t):
-        return "math_hl" if ("hl" in t or "higher level" in t) else "math"
-    if "further math" in t:         return "further_maths"
-    if re.search(r"\becon", t):     return "economics"
-    if "english" in t:              return "english"
-    if "physics" in t:              return "physics"
-    if "chem" in t:                 return "chemistry"
-    if re.search(r"\bbio", t):      return "biology"
-    if "psych" in t:                return "psychology"
-    if "computer" in t and "science" in t: return "computer_science"
+    for tok, subject in _SUBJECT_BY_TOKEN:
+        if tok in found:
+            return subject
+    if "computer" in found and "science" in found:
+        return "computer_science"
     return t
 
 
+_RE_IB_MATH_REQ = re.compile(r"math|analysis and approaches|aa hl")
+_IB_REQ_TOKENS = ["biology", "chemistry", "physics", "psychology", "economics", "computer science"]
+_RE_IB_REQ_TOKENS = re.compile("|".join(_IB_REQ_TOKENS))
+_ALEVEL_REQ_TOKENS = ["physics", "chemistry", "biology", "computer science", "economics"]
+_RE_ALEVEL_REQ_TOKENS = re.compile("|".join(_ALEVEL_REQ_TOKENS))
+# Required-subject tokens are constants, so their normalised forms are too
+_REQ_TOKEN_SUBJECT: Dict[str, str] = {tok: normalize_subject(tok) for tok in _IB_REQ_TOKENS}
+
+
 def required_subject_gate_ib(
     required_text: str, hl_subjects: List[str]
 ) -> Tuple[bool, List[str], List[str]]:
@@ -401,17 +764,17 @@ def required_subject_gate_ib(
     failed: List[str] = []
     hl_norm = {normalize_subject(s) for s in hl_subjects}
 
-    if any(tok in req for tok in ["math", "maths", "analysis and approaches", "aa hl", "math aa"]):
+    if _RE_IB_MATH_REQ.search(req):
         if "math_hl" in hl_norm:
             passed.append("Meets subject requirement (HL Maths)")
         else:
             failed.append("Missing required subject: HL Maths")
             return False, passed, failed
 
-    tokens = ["biology", "chemistry", "physics", "psychology", "economics", "computer science"]
-    present = [tok for tok in tokens if tok in req]
+    found = set(_RE_IB_REQ_TOKENS.findall(req))
+    present = [tok for tok in _IB_REQ_TOKENS if tok in found]
     if present:
-        matched = next((tok for tok in present if normalize_subject(tok) in hl_norm), None)
+        matched = next((tok for tok in present if _REQ_TOKEN_SUBJECT[tok] in hl_norm), None)
         if matched:
             passed.append(f"Meets subject requirement ({matched.title()})")
         else:
@@ -429,16 +792,17 @@ def required_subject_gate_alevel(
     failed: List[str] = []
     s_norm = {normalize_subject(s) for s in subjects}
 
-    if re.search(r"\bmath", req):
+    if _RE_MATH_WORD.search(req):
         if "math" in s_norm or "math_hl" in s_norm or "further_maths" in s_norm:
             passed.append("Meets subject requirement (Maths)")
         else:
             failed.append("Missing required subject: Maths")
             return False, passed, failed
 
-    for key in ["physics", "chemistry", "biology", "computer science", "economics"]:
-        if key in req:
-            if normalize_subject(key) in s_norm:
+    found = set(_RE_ALEVEL_REQ_TOKENS.findall(req))
+    for key in _ALEVEL_REQ_TOKENS:
+        if key in found:
+            if _REQ_TOKEN_SUBJECT[key] in s_norm:
                 passed.append(f"Meets subject requirement ({key.title()})")
             else:
                 failed.append(f"Missing required subject: {key.title()}")
@@ -454,16 +818,10 @@ def required_subject_gate_alevel(
 _GRADE_RANK = {"A*": 6, "A": 5, "B": 4, "C": 3, "D": 2, "E": 1}
 
 
-def _parse_offer_pattern(pat: str) -> List[str]:
-    pat = pat.strip().upper()
-    out: List[str] = []
-    i = 0
-    while i < len(pat):
-        if i + 1 < len(pat) and pat[i] == "A" and pat[i + 1] == "*":
-            out.append("A*"); i += 2
-        else:
-            out.append(pat[i]); i += 1
-    return [g for g in out if g in _GRADE_RANK][:3]
+@functools.lru_cache(maxsize=1024)
+def _parse_offer_pattern(pat: str) -> Tuple[str, ...]:
+    # Tuple so the cached result can't be mutated by a caller
+    return tuple(_RE_GRADES.findall(pat.upper())[:3])
 
 
 def score_ib(
@@ -479,7 +837,7 @@ def score_ib(
 
     score = 55
     margin = P - threshold_used
-    margin_bonus = min(30, int(round(max(0, margin) * 7)))
+    margin_bonus = min(30, max(0, margin) * 7)  # all ints — no float round-trip
     if margin_bonus:
         score += margin_bonus
         breakdown.append({"name": "Points above threshold", "points": margin_bonus})
@@ -501,7 +859,7 @@ def score_ib(
         score -= 12
         breakdown.append({"name": "International borderline penalty", "points": -12})
 
-    return max(0, min(100, score)), breakdown
+    return _clamp100(score), breakdown
 
 
 def score_alevel(
@@ -538,7 +896,30 @@ def score_alevel(
     else:
         notes.append("Typical offer not found in course data; result is approximate.")
 
-    return max(0, min(100, score)), breakdown, notes, margin_sum
+    return _clamp100(score), breakdown, notes, margin_sum
+
+
+def score_ib_batch(P: int, home_min: np.ndarray, intl_buffer: np.ndarray, is_intl: bool) -> np.ndarray:
+    """score_ib over many courses at once — same arithmetic, no breakdown."""
+    intl_threshold = home_min + intl_buffer
+    threshold_used = intl_threshold if is_intl else home_min
+    score = 55 + np.minimum(30, np.maximum(0, P - threshold_used) * 7)
+    if is_intl:
+        score += np.where(P >= intl_threshold, 8, 0)
+        score -= np.where((home_min <= P) & (P < intl_threshold), 12, 0)
+    score -= np.where(P == home_min - 1, 18, 0)
+    score -= np.where(P == home_min - 2, 28, 0)
+    return np.where(P <= home_min - 3, 0, np.clip(score, 0, 100))
+
+
+def score_alevel_batch(predicted: List[str], req_ranks: np.ndarray, has_req: np.ndarray) -> np.ndarray:
+    """score_alevel over many courses at once — same arithmetic, no breakdown or notes."""
+    ranks = sorted([_GRADE_RANK.get(g.upper(), 0) for g in predicted], reverse=True)[:3]
+    if len(ranks) < 3:
+        return np.zeros(len(has_req), dtype=np.int64)
+    margin_sum = (np.asarray(ranks) - req_ranks).sum(axis=1)
+    adjust = np.where(margin_sum > 0, np.minimum(24, margin_sum * 6), np.maximum(-40, margin_sum * 10))
+    return np.clip(55 + np.where(has_req, adjust, 0), 0, 100)
 
 
 def band_from_score(score: int) -> str:
@@ -590,6 +971,14 @@ class OfferAssessRequest(BaseModel):
     ps: Optional[PsInput] = None
 
 
+class AssessBatchRequest(BaseModel):
+    course_ids: List[str] = Field(min_length=1, max_length=100)
+    home_or_intl: str = Field(pattern="^(home|intl)$")
+    curriculum: str = Field(pattern="^(IB|A_LEVELS)$")
+    ib: Optional[IBPayload] = None
+    a_levels: Optional[ALevelPayload] = None
+
+
 class RubricCell(BaseModel):
     score: int = Field(ge=0, le=10)
     why: List[str]
@@ -607,7 +996,7 @@ class PsSuggestedEdit(BaseModel):
 # Gemini: counsellor rewrite
 # ─────────────────────────────────────────────────────────────
 
-def counsellor_rewrite_with_gemini(
+async def counsellor_rewrite_with_gemini(
     detail_level: str,
     payload_summary: Dict[str, Any],
 ) -> Optional[Dict[str, Any]]:
@@ -627,11 +1016,11 @@ def counsellor_rewrite_with_gemini(
         f"- Detail level: {style}.\n"
         "  BRIEF: 2-4 bullets total across all sections.\n"
         "  DETAILED: up to 5 bullets per section.\n\n"
-        f"Context: {json.dumps(payload_summary)}"
+        f"Context: {prompt_json(payload_summary)}"
     )
 
     tid = uuid.uuid4().hex[:8]
-    result, _err, _ms = call_gemini_json(
+    result, _err, _ms = await acall_gemini_json(
         prompt,
         trace_id=tid,
     )
@@ -657,23 +1046,27 @@ def ps_constraints(format_: str, q1: str, q2: str, q3: str, statement: str) -> D
     return {"q1_chars": 0, "q2_chars": 0, "q3_chars": 0, "total_chars": total, "warnings": warnings}
 
 
+_PS_EVIDENCE_MARKERS = [
+    "i learned", "i realised", "i realized", "this led me",
+    "i investigated", "i analysed", "i analyzed", "which showed", "because",
+]
+# Markers never overlap one another, so one scan counts the same as per-marker str.count
+_RE_PS_EVIDENCE = re.compile("|".join(map(re.escape, _PS_EVIDENCE_MARKERS)))
+# Clichés can overlap ("ever since i was young"), so these stay as substring checks
+_PS_CLICHES = [
+    "since i was young", "from a young age", "always been fascinated",
+    "i am passionate", "i've always been passionate", "dream to", "ever since",
+]
+
+
 def ps_heuristics(text: str) -> Dict[str, Any]:
     t = text.lower()
-    evidence_markers = [
-        "i learned", "i realised", "i realized", "this led me",
-        "i investigated", "i analysed", "i analyzed", "which showed", "because",
-    ]
-    evidence_count = sum(t.count(m) for m in evidence_markers)
-    cliche_hits = [c for c in [
-        "since i was young", "from a young age", "always been fascinated",
-        "i am passionate", "i've always been passionate", "dream to", "ever since",
-    ] if c in t]
-    proper_nouns = len(re.findall(r"\b[A-Z][a-z]{2,}\b", text))
-    words = re.findall(r"[A-Za-z']+", t)
-    ngrams = [" ".join(words[i:i+4]) for i in range(max(0, len(words) - 3))]
-    freq: Dict[str, int] = {}
-    for g in ngrams:
-        freq[g] = freq.get(g, 0) + 1
+    evidence_count = len(_RE_PS_EVIDENCE.findall(t))
+    cliche_hits = [c for c in _PS_CLICHES if c in t]
+    proper_nouns = len(_RE_PROPER.findall(text))
+    words = _RE_WORDS.findall(t)
+    # 4-word windows as tuples — no joined strings needed just to count repeats
+    freq = Counter(zip(words, words[1:], words[2:], words[3:]))
     repeated = sum(1 for v in freq.values() if v >= 3)
     return {
         "evidence_markers_count":    evidence_count,
@@ -708,41 +1101,16 @@ def ps_band(total: int) -> str:
     return "Exceptional"
 
 
-def build_ps_prompt(
-    course_row: Dict[str, Any],
-    ps: PsInput,
-    constraints: Dict[str, Any],
-    heur: Dict[str, Any],
-) -> str:
-    signals     = split_signals(clean_str(course_row.get("ps_expected_signals")))
-    course_name = clean_str(course_row.get("course_name"))
-    faculty     = clean_str(course_row.get("faculty"))
-    course_url  = clean_str(course_row.get("course_url"))
-
-    ps_text = (
-        f"Q1: {ps.q1 or ''}\n\nQ2: {ps.q2 or ''}\n\nQ3: {ps.q3 or ''}"
-        if ps.format == "UCAS_3Q"
-        else (ps.statement or "")
-    )
-
-    # FIX: original passed constraints/heur as Python repr() in f-string
-    # e.g. {'q1_chars': 400, ...} — not valid JSON, confuses the model
-    # Now serialised properly with json.dumps()
-    return f"""You are an admissions-style UCAS personal statement reviewer.
-Return ONLY valid JSON. No markdown, no code fences, no preamble.
-
-Context:
-- course_name: {course_name}
-- faculty: {faculty}
-- course_url: {course_url}
-- expected_signals: {json.dumps(signals)}
-
-Constraints: {json.dumps(constraints)}
-Heuristics: {json.dumps(heur)}
-
-Statement:
-{ps_text}
+# Static scaffolding of the course-aware PS prompt, assembled once at import.
+# Only the course context, constraints, heuristics and statement vary per request;
+# rewrite_mode is a bool, so both variants of the footer are prebuilt.
+_PS_PROMPT_HEADER = (
+    "You are an admissions-style UCAS personal statement reviewer.\n"
+    "Return ONLY valid JSON. No markdown, no code fences, no preamble.\n\n"
+    "Context:\n"
+)
 
+_PS_PROMPT_FOOTER_TEMPLATE = """
 Rubric — score each dimension 0–10:
 - q1_motivation_course_fit          (why this subject, intellectual curiosity)
 - q2_academic_preparation           (relevant reading, coursework, academic depth)
@@ -755,36 +1123,91 @@ Rubric — score each dimension 0–10:
 Rules:
 - Evidence snippets must be direct short quotes of ≤12 words from the statement.
 - Do not invent achievements not present in the statement.
-- rewrite_mode={str(ps.rewrite_mode).lower()}: {"provide at most 2 short paragraph rewrites" if ps.rewrite_mode else "set example_rewrite_optional to null for every edit"}.
+- __REWRITE_RULE__
 - Be specific and honest. Penalise: generic openers, unsubstantiated claims, activity-listing without reflection.
 
 Required JSON structure:
-{{
-  "rubric": {{
-    "<dimension_key>": {{
+{
+  "rubric": {
+    "<dimension_key>": {
       "score": <0-10>,
       "why": ["<reason>"],
       "evidence_snippets": ["<short quote>"]
-    }}
-  }},
-  "alignment": {{
+    }
+  },
+  "alignment": {
     "signals_covered": ["<signal>"],
     "signals_missing": ["<signal>"],
     "coverage_notes": ["<note>"]
-  }},
+  },
   "strengths": ["<strength>"],
   "risks": ["<risk>"],
   "red_flags": ["<flag>"],
   "what_to_do_next": ["<action>"],
   "suggested_edits": [
-    {{
+    {
       "target": "<Q1|Q2|Q3|GLOBAL>",
       "priority": "<high|med|low>",
       "change": "<what to change>",
       "example_rewrite_optional": "<rewrite or null>"
-    }}
+    }
   ]
-}}"""
+}"""
+
+_PS_PROMPT_FOOTER: Dict[bool, str] = {
+    True: _PS_PROMPT_FOOTER_TEMPLATE.replace(
+        "__REWRITE_RULE__", "rewrite_mode=true: provide at most 2 short paragraph rewrites."
+    ),
+    False: _PS_PROMPT_FOOTER_TEMPLATE.replace(
+        "__REWRITE_RULE__", "rewrite_mode=false: set example_rewrite_optional to null for every edit."
+    ),
+}
+
+
+def _course_prompt_context(course_row: Dict[str, Any]) -> str:
+    return (
+        f"- course_name: {clean_str(course_row.get('course_name'))}\n"
+        f"- faculty: {clean_str(course_row.get('faculty'))}\n"
+        f"- course_url: {clean_str(course_row.get('course_url'))}\n"
+        f"- expected_signals: {prompt_json(course_signals(course_row))}"
+    )
+
+
+# Course rows never change after load, so the context block is cached per course_id
+@functools.lru_cache(maxsize=512)
+def _cached_course_prompt_context(course_id: str) -> str:
+    return _course_prompt_context(get_row(course_id))
+
+
+def build_ps_prompt(
+    course_row: Dict[str, Any],
+    ps: PsInput,
+    constraints: Dict[str, Any],
+    heur: Dict[str, Any],
+) -> str:
+    course_id = course_row.get("course_id")
+    context = (
+        _cached_course_prompt_context(course_id)
+        if course_id in _ROW_INDEX
+        else _course_prompt_context(course_row)
+    )
+
+    ps_text = (
+        f"Q1: {ps.q1 or ''}\n\nQ2: {ps.q2 or ''}\n\nQ3: {ps.q3 or ''}"
+        if ps.format == "UCAS_3Q"
+        else (ps.statement or "")
+    )
+
+    # FIX: original passed constraints/heur as Python repr() in f-string
+    # e.g. {'q1_chars': 400, ...} — not valid JSON, confuses the model
+    # Now serialised properly as JSON (prompt_json)
+    return (
+        f"{_PS_PROMPT_HEADER}{context}\n\n"
+        f"Constraints: {prompt_json(constraints)}\n"
+        f"Heuristics: {prompt_json(heur)}\n\n"
+        f"Statement:\n{ps_text}\n"
+        f"{_PS_PROMPT_FOOTER[bool(ps.rewrite_mode)]}"
+    )
 
 
 def _sanitise_rubric(raw: Dict[str, Any]) -> Dict[str, Any]:
@@ -807,20 +1230,22 @@ def _sanitise_rubric(raw: Dict[str, Any]) -> Dict[str, Any]:
     return raw
 
 
-def run_ps_analyzer(
+async def run_ps_analyzer(
     course_row: Dict[str, Any], ps: PsInput
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     if not is_gemini_available():
         return None, "PS analysis unavailable (Gemini not configured)."
 
     q1 = ps.q1 or ""; q2 = ps.q2 or ""; q3 = ps.q3 or ""; statement = ps.statement or ""
-    full_text   = (q1 + "\n" + q2 + "\n" + q3) if ps.format == "UCAS_3Q" else statement
+    full_text   = "\n".join((q1, q2, q3)) if ps.format == "UCAS_3Q" else statement
     constraints = ps_constraints(ps.format, q1, q2, q3, statement)
     heur        = ps_heuristics(full_text)
     prompt      = build_ps_prompt(course_row, ps, constraints, heur)
 
+    # The prompt is fully determined by (course, statement, format, rewrite_mode),
+    # so the shared response cache serves "run → tweak → rerun" resubmissions
     tid = uuid.uuid4().hex[:8]
-    raw, err, _ms = call_gemini_json(prompt, trace_id=tid)
+    raw, err, _ms = await acall_gemini_json(prompt, trace_id=tid, cacheable=True)
     if err:
         return None, err.message
     if raw is None:
@@ -848,7 +1273,7 @@ def run_ps_analyzer(
     if not isinstance(raw.get("alignment"), dict): raw["alignment"] = {}
     for k in ("signals_covered", "signals_missing", "coverage_notes"):
         raw["alignment"].setdefault(k, [])
-    raw["alignment"]["ps_expected_signals"] = split_signals(clean_str(course_row.get("ps_expected_signals")))
+    raw["alignment"]["ps_expected_signals"] = list(course_signals(course_row))
 
     rubric_obj = {k: RubricCell(**v) for k, v in raw["rubric"].items()}
     wt = weighted_score_from_rubric(rubric_obj)
@@ -860,7 +1285,7 @@ def run_ps_analyzer(
         "faculty":      course_row.get("faculty"),
         "format":       ps.format,
         "generated_at": datetime.now(timezone.utc).isoformat(),
-        "model":        os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+        "model":        _GEMINI_MODEL_NAME,
     }
     raw["constraints"] = constraints
     return raw, None
@@ -872,70 +1297,188 @@ def run_ps_analyzer(
 # FIX: this route was entirely missing — frontend got a 404
 # ─────────────────────────────────────────────────────────────
 
-def run_standalone_ps_analysis(
-    statement: str,
-    lines: List[str],
-    ps_format: str,
-) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
-    """
-    Standalone PS analyser used by /api/py/analyse_ps.
-    Tries Gemini first; if unavailable or fails, falls back to a rule-based heuristic
-    implementation so the feature still works instead of returning 500s.
-    """
-    heur = ps_heuristics(statement)
+# Passed to Gemini as response_schema, so the shape is enforced by the model
+# rather than spelled out as a JSON template in every prompt
+class PsLineFeedback(BaseModel):
+    lineNumber: int
+    score: int
+    verdict: str
+    feedback: str
+    suggestion: Optional[str] = None
+
+
+class PsAnalysisResult(BaseModel):
+    overallScore: int
+    band: str
+    summary: str
+    strengths: List[str]
+    weaknesses: List[str]
+    topPriority: str
+    lineFeedback: List[PsLineFeedback]
+
+
+_PS_ANALYSIS_CONFIG: Dict[str, Any] = {"response_schema": PsAnalysisResult}
+
+
+# Prompt-size bounds for /analyse_ps. UCAS caps a statement at 4,000 characters, so
+# these only bite on pasted essays or runaway chunking, not real submissions.
+_PS_PROMPT_STATEMENT_CHARS = 8000
+_PS_PROMPT_CHUNK_CHARS     = 400
 
-    # ── Fallback: no Gemini configured ────────────────────────────────
-    if not is_gemini_available():
-        return _fallback_ps_analysis(statement, lines, heur), None
 
-    prompt = f"""You are a world-class UK university admissions consultant.
-Analyse this personal statement and return ONLY valid JSON. No markdown, no code fences.
+def _standalone_ps_prompt(statement: str, lines: List[str], ps_format: str, heur: Dict[str, Any]) -> str:
+    # One "index: text" row per chunk — far fewer tokens than an indented JSON array
+    numbered = "\n".join(
+        f"{i}: {_RE_WS.sub(' ', str(line)).strip()[:_PS_PROMPT_CHUNK_CHARS]}" for i, line in enumerate(lines)
+    )
+    total_chars = len(statement)
+    if total_chars > _PS_PROMPT_STATEMENT_CHARS:
+        statement = statement[:_PS_PROMPT_STATEMENT_CHARS] + " […truncated]"
+    return f"""You are a world-class UK university admissions consultant.
+Analyse this personal statement.
 
 Format: {ps_format}
-Total characters: {len(statement)}
-Heuristics: {json.dumps(heur)}
+Total characters: {total_chars}
+Heuristics: {prompt_json(heur)}
 
 Statement:
 \"\"\"
 {statement}
 \"\"\"
 
-Sentence chunks ({len(lines)} total):
-{json.dumps([{{"index": i, "text": line}} for i, line in enumerate(lines)], indent=2)}
+Sentence chunks ({len(lines)} total, as "lineNumber: text"):
+{numbered}
 
-Return exactly this structure:
-{{
-  "overallScore": <integer 0-100>,
-  "band": "<Exceptional|Strong|Solid|Developing|Weak>",
-  "summary": "<2-3 sentence honest overall assessment>",
-  "strengths": ["<strength 1>", "<strength 2>", "<strength 3>"],
-  "weaknesses": ["<weakness 1>", "<weakness 2>", "<weakness 3>"],
-  "topPriority": "<single most important improvement>",
-  "lineFeedback": [
-    {{
-      "lineNumber": <0-based index>,
-      "line": "<exact chunk text>",
-      "score": <1-10>,
-      "verdict": "<strong|weak|improve|neutral>",
-      "feedback": "<1-2 sentence honest critique>",
-      "suggestion": "<improved rewrite, or null>"
-    }}
-  ]
-}}
+Fields:
+- overallScore: 0-100; band: Exceptional|Strong|Solid|Developing|Weak
+- summary: 2-3 sentence honest overall assessment; topPriority: the single most important improvement
+- strengths, weaknesses: 3 each
+- lineFeedback: one per chunk — lineNumber (0-based), score 1-10, verdict strong|weak|improve|neutral,
+  feedback (1-2 sentence honest critique), suggestion (improved rewrite, or null)
 
 Be specific and honest. Reward: intellectual curiosity backed by evidence, specific examples,
 subject depth, authentic voice. Penalise: generic openers, vague claims, clichés,
 activities listed without reflection."""
 
+
+async def run_standalone_ps_analysis(
+    statement: str,
+    lines: List[str],
+    ps_format: str,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Standalone PS analyser used by /api/py/analyse_ps.
+    Tries Gemini first; if unavailable or fails, falls back to a rule-based heuristic
+    implementation so the feature still works instead of returning 500s.
+    """
+    heur = ps_heuristics(statement)
+
+    # ── Fallback: no Gemini configured ────────────────────────────────
+    if not is_gemini_available():
+        return _fallback_ps_analysis(statement, lines, heur), None
+
+    prompt = _standalone_ps_prompt(statement, lines, ps_format, heur)
+
+    # Prompt covers (statement, lines, format); the cache key adds the model
     tid = uuid.uuid4().hex[:8]
-    result, err, _ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, _ms = await acall_gemini_json(prompt, trace_id=tid, config_extra=_PS_ANALYSIS_CONFIG, cacheable=True)
     if err or result is None:
         # Degrade gracefully to heuristic output on any error, or if Gemini
         # returns JSON null (json.loads("null") → Python None, err is None).
         return _fallback_ps_analysis(statement, lines, heur), err.message if err else None
+    _attach_line_text(result, lines)
     return result, None
 
 
+def _attach_line_text(result: Dict[str, Any], lines: List[str]) -> None:
+    """
+    The model is not asked to echo each chunk (that doubled the output it had
+    to decode), so fill lineFeedback[i]["line"] back in from the request's lines.
+    """
+    feedback = result.get("lineFeedback")
+    if not isinstance(feedback, list):
+        return
+    for item in feedback:
+        if isinstance(item, dict):
+            _attach_item_line(item, lines)
+
+
+def _attach_item_line(item: Dict[str, Any], lines: List[str]) -> None:
+    n = item.get("lineNumber")
+    if isinstance(n, int) and not isinstance(n, bool) and 0 <= n < len(lines):
+        item["line"] = lines[n]
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+class _LineFeedbackScanner:
+    """
+    Pulls complete lineFeedback objects out of a partially streamed response.
+    feed() takes the next text chunk and returns the items finished by it.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos: Optional[int] = None  # just inside the lineFeedback array, once seen
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buf += chunk
+        if self._pos is None:
+            k = self._buf.find('"lineFeedback"')
+            b = self._buf.find("[", k) if k >= 0 else -1
+            if b < 0:
+                return []
+            self._pos = b + 1
+        items: List[Dict[str, Any]] = []
+        buf = self._buf
+        while True:
+            i = self._pos
+            while i < len(buf) and buf[i] in " \t\r\n,":
+                i += 1
+            if i >= len(buf) or buf[i] == "]":
+                return items
+            try:
+                obj, end = _JSON_DECODER.raw_decode(buf, i)
+            except ValueError:
+                return items  # object not finished yet
+            self._pos = end
+            if isinstance(obj, dict):
+                items.append(obj)
+
+
+async def stream_standalone_ps_analysis(statement: str, lines: List[str], ps_format: str):
+    """
+    NDJSON twin of run_standalone_ps_analysis for /analyse_ps?stream. Yields one
+    {"type": "line", "item": ...} per lineFeedback entry as Gemini finishes it,
+    then a final {"type": "result", "result": ...} with the same payload the
+    non-streaming route returns (heuristic fallback included).
+    """
+    heur = ps_heuristics(statement)
+    result: Optional[Dict[str, Any]] = None
+    try:
+        if is_gemini_available():
+            scanner = _LineFeedbackScanner()
+            prompt = _standalone_ps_prompt(statement, lines, ps_format, heur)
+            tid = uuid.uuid4().hex[:8]
+            async for kind, payload in astream_gemini_json(prompt, trace_id=tid, config_extra=_PS_ANALYSIS_CONFIG):
+                if kind == "text":
+                    for item in scanner.feed(payload):
+                        _attach_item_line(item, lines)
+                        yield prompt_json({"type": "line", "item": item}) + "\n"
+                else:
+                    result, _err, _ms = payload
+        if result is None:
+            result = _fallback_ps_analysis(statement, lines, heur)
+        else:
+            _attach_line_text(result, lines)
+    except Exception:
+        # Same last resort as the non-streaming route: never end the stream without a result
+        logger.exception("streamed PS analysis failed; sending heuristic result")
+        result = _fallback_ps_analysis(statement, lines, heur)
+    yield prompt_json({"type": "result", "result": result}) + "\n"
+
+
 def _fallback_ps_analysis(
     statement: str, lines: List[str], heur: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -944,7 +1487,7 @@ def _fallback_ps_analysis(
     It is intentionally simple but stable so the feature keeps working in all envs.
     """
     total_chars = len(statement)
-    words = re.findall(r"[A-Za-z']+", statement)
+    words = _RE_WORDS.findall(statement)
     word_count = len(words)
 
     evidence_markers = heur.get("evidence_markers_count", 0)
@@ -1133,6 +1676,18 @@ INTEREST_KEYWORDS: Dict[str, List[str]] = {
 }
 
 
+# Every mapped keyword. Course text is static, so load_df records which of these
+# each course contains once; scoring then needs set lookups, not substring scans.
+_ALL_INTEREST_KEYWORDS = frozenset(kw for kws in INTEREST_KEYWORDS.values() for kw in kws)
+
+
+def interest_keyword_hits(text: str) -> frozenset:
+    return frozenset(kw for kw in _ALL_INTEREST_KEYWORDS if kw in text)
+
+
+# Interests come from a small fixed vocabulary, and /suggest resolves each one
+# against every course — cache the resolution (callers only read the list).
+@functools.lru_cache(maxsize=512)
 def _get_keywords(interest: str) -> List[str]:
     lower = interest.lower().strip()
     if lower in INTEREST_KEYWORDS:
@@ -1143,13 +1698,24 @@ def _get_keywords(interest: str) -> List[str]:
     return [lower]
 
 
-def _score_course_interest(course_name: str, faculty: str, interests: List[str]) -> Tuple[int, str, str]:
-    """Returns (score, top_interest, matched_keyword) for a course against interests."""
-    text = f"{course_name} {faculty}".lower()
+def _score_course_interest(
+    text_lc: str, interests: List[str], keyword_hits: Optional[frozenset] = None
+) -> Tuple[int, str, str]:
+    """
+    Returns (score, top_interest, matched_keyword) for a course against interests.
+    text_lc is the lowercased "course_name faculty" and keyword_hits its
+    interest_keyword_hits(), both precomputed by load_df; keywords outside
+    INTEREST_KEYWORDS (free-text interests) fall back to a substring check.
+    """
+    if keyword_hits is None:
+        keyword_hits = interest_keyword_hits(text_lc)
     best_score, best_interest, best_kw = 0, "", ""
     for interest in interests:
         kws = _get_keywords(interest)
-        matched = [kw for kw in kws if kw in text]
+        matched = [
+            kw for kw in kws
+            if (kw in keyword_hits if kw in _ALL_INTEREST_KEYWORDS else kw in text_lc)
+        ]
         if len(matched) > best_score:
             best_score = len(matched)
             best_interest = interest
@@ -1165,34 +1731,22 @@ def _deterministic_suggestions(
     """Server-side equivalent of computeHiddenGems in lib/explore.ts."""
     if not interests:
         return []
-    df = load_df()
+    load_df()
     excl_lower = {n.lower().strip() for n in exclude_names}
 
-    # Aggregate to unique courses
-    grp = df.groupby("course_name", as_index=False).agg(
-        faculty=("faculty", "first"),
-        universities_count=("university_id", "nunique"),
-        faculties=("faculty", lambda x: list({str(v) for v in x if pd.notna(v)})),
-    )
-
+    # Unique courses are grouped once in load_df — course names are distinct there
     scored: List[Tuple[int, str, str, Dict[str, Any]]] = []
-    seen_names: set = set()
-    for _, row in grp.iterrows():
-        name = str(row["course_name"])
-        if name.lower().strip() in excl_lower:
-            continue
-        if name in seen_names:
+    for c in _INTEREST_COURSES:
+        if c["name_lc"] in excl_lower:
             continue
-        seen_names.add(name)
-        score, top_interest, top_kw = _score_course_interest(
-            name, str(row.get("faculty") or ""), interests
-        )
+        name = c["course_name"]
+        score, top_interest, top_kw = _score_course_interest(c["text_lc"], interests, c["keyword_hits"])
         if score > 0:
             reason = f"Matches your interest in {top_interest} — based on \"{top_kw}\" alignment"
             scored.append((score, top_interest, reason, {
                 "course_name": name,
-                "universities_count": int(row.get("universities_count") or 1),
-                "faculties": row.get("faculties") or [],
+                "universities_count": c["universities_count"],
+                "faculties": list(c["faculties"]),
                 "reason": reason,
             }))
 
@@ -1201,33 +1755,25 @@ def _deterministic_suggestions(
 
 
 def suggest_alternatives(course_id: str, home_min_target: Optional[int]) -> Dict[str, Any]:
-    df = load_df()
-    this_row = df[df["course_id"] == course_id]
-    if this_row.empty:
+    load_df()
+    this_row = _ROW_INDEX.get(course_id)
+    if this_row is None:
         return {"suggested_course_ids": [], "suggested_course_names": []}
 
-    faculty = this_row.iloc[0].get("faculty")
-    pool = df[df["course_id"] != course_id]
-    if faculty:
-        pool = pool[pool["faculty"] == faculty]
-
-    candidates: List[Tuple[str, str, Optional[int]]] = []
-    for _, r in pool.iterrows():
-        ib_min = extract_ib_min_points([
-            clean_str(r.get("min_points_home")),
-            clean_str(r.get("min_requirements")),
-            clean_str(r.get("typical_offer")),
-        ])
-        candidates.append((str(r.get("course_id")), str(r.get("course_name")), ib_min))
-
+    cols = _SCORE_ARRAYS
+    faculty = this_row.get("faculty")
+    idx = _FACULTY_POS.get(faculty, _NO_ROWS) if faculty else np.arange(len(cols["course_id"]))
+    mask = cols["course_id"][idx] != course_id
     if home_min_target is not None:
-        candidates = [c for c in candidates if c[2] is not None and c[2] <= home_min_target]
+        mask &= cols["has_home_min"][idx] & (cols["home_min"][idx] <= home_min_target)
 
-    candidates.sort(key=lambda x: (x[2] if x[2] is not None else 999, x[1]))
-    top = candidates[:3]
+    # Lowest IB minimum first (unparsed last), then course name; lexsort is stable like sorted()
+    idx = idx[mask]
+    ib_min = np.where(cols["has_home_min"][idx], cols["home_min"][idx], 999)
+    top = idx[np.lexsort((cols["course_name"][idx], ib_min))[:3]]
     return {
-        "suggested_course_ids":   [c[0] for c in top],
-        "suggested_course_names": [c[1] for c in top],
+        "suggested_course_ids":   cols["course_id"][top].tolist(),
+        "suggested_course_names": cols["course_name"][top].tolist(),
     }
 
 
@@ -1292,7 +1838,7 @@ def health():
         return {
             "status":       "ok",
             "courses":      len(df),
-            "universities": int(df["university_id"].nunique()) if "university_id" in df.columns else 0,
+            "universities": _UNIVERSITY_COUNT,
             "gemini":       is_gemini_available(),
             "data_file":    pick_data_path().name,
         }
@@ -1302,37 +1848,29 @@ def health():
 
 @app.get("/api/py/universities")
 def universities():
-    df = load_df()
-    ids = sorted({clean_str(x) for x in df["university_id"].fillna("").tolist() if clean_str(x)})
-    return [
-        {"university_id": uid, "university_name": UNIVERSITY_NAME_MAP.get(uid, uid)}
-        for uid in ids
-    ]
+    load_df()
+    return json_response(_UNIVERSITIES)
+
+
+def _stream_course_records(rows: List[int]):
+    for i in rows:
+        yield prompt_json(_COURSES_RECORDS[i]) + "\n"
 
 
 @app.get("/api/py/courses")
-def courses(university_id: Optional[str] = None, query: Optional[str] = None):
+def courses(university_id: Optional[str] = None, query: Optional[str] = None, stream: bool = False):
     # FIX: original had no ?query= param — search page couldn't use it
-    df = load_df()
-    wanted = [
-        "university_id", "course_id", "course_name", "faculty",
-        "degree_type", "estimated_annual_cost_international", "min_requirements",
-    ]
-    cols = [c for c in wanted if c in df.columns]
-    out  = df[cols].copy()
-
-    if university_id:
-        out = out[out["university_id"].astype(str).str.upper() == university_id.upper()]
+    load_df()
+    # Row positions into _DF; the indices and search column are precomputed in load_df
+    rows = _UNIV_ROWS.get(university_id.upper(), _NO_ROWS) if university_id else np.arange(len(_COURSES_RECORDS))
     if query:
-        q    = query.lower()
-        name = out["course_name"].astype(str).str.lower().str.contains(q, na=False)
-        fac  = out["faculty"].astype(str).str.lower().str.contains(q, na=False) if "faculty" in out.columns else pd.Series(False, index=out.index)
-        out  = out[name | fac]
+        rows = rows[_SEARCH_BLOB.iloc[rows].str.contains(query.lower(), regex=False).to_numpy()]
 
-    out = out.where(pd.notna(out), None)
-    if "estimated_annual_cost_international" in out.columns:
-        out["estimated_annual_cost_international"] = out["estimated_annual_cost_international"].map(to_money)
-    return out.to_dict(orient="records")
+    # ?stream=true: one record per NDJSON line, so the full JSON array is never
+    # held in memory at once. The default array response is unchanged.
+    if stream:
+        return StreamingResponse(_stream_course_records(rows.tolist()), media_type="application/x-ndjson")
+    return json_response([_COURSES_RECORDS[i] for i in rows.tolist()])
 
 
 @app.get("/api/py/course/{course_id}")
@@ -1350,70 +1888,12 @@ def unique_courses(q: Optional[str] = None):
     if "course_name" not in df.columns or "university_id" not in df.columns:
         raise HTTPException(status_code=500, detail="course_name/university_id missing from data")
 
-    view = df[["course_name", "university_id", "faculty", "degree_type", "min_requirements"]].copy()
-    if q:
-        ql = q.lower()
-        name_mask = view["course_name"].astype(str).str.lower().str.contains(ql, na=False)
-        fac_mask = view["faculty"].astype(str).str.lower().str.contains(ql, na=False)
-        view = view[name_mask | fac_mask]
-
-    records: Dict[str, Dict[str, Any]] = {}
-    for _, row in view.iterrows():
-        name = clean_str(row.get("course_name"))
-        if not name:
-            continue
-        key = normalize_course_key(name)
-        uni_id = clean_str(row.get("university_id"))
-        fac = clean_str(row.get("faculty"))
-        deg = clean_str(row.get("degree_type"))
-        min_req = clean_str(row.get("min_requirements"))
-
-        if key not in records:
-            records[key] = {
-                "course_key": key,
-                "course_name": name,
-                "universities": [],
-                "faculties": set(),
-                "degree_types": set(),
-                "min_entry_examples": [],
-            }
-
-        rec = records[key]
-        if uni_id:
-            uni_name = UNIVERSITY_NAME_MAP.get(uni_id, uni_id)
-            if not any(u["university_id"] == uni_id for u in rec["universities"]):
-                rec["universities"].append({"university_id": uni_id, "university_name": uni_name})
-        if fac:
-            rec["faculties"].add(fac)
-        if deg:
-            rec["degree_types"].add(deg)
-        if min_req:
-            if len(rec["min_entry_examples"]) < 3 and min_req not in rec["min_entry_examples"]:
-                rec["min_entry_examples"].append(min_req)
-
-    out: List[Dict[str, Any]] = []
-    for key, rec in records.items():
-        faculties = sorted(rec["faculties"])
-        degree_types = sorted(rec["degree_types"])
-        min_entry_hint = None
-        if rec["min_entry_examples"]:
-            # Just show one short string as a hint; keep it honest and simple.
-            min_entry_hint = rec["min_entry_examples"][0]
-        out.append(
-            {
-                "course_key": rec["course_key"],
-                "course_name": rec["course_name"],
-                "universities_count": len(rec["universities"]),
-                "universities": rec["universities"],
-                "faculties": faculties,
-                "degree_types": degree_types,
-                "min_entry_hint": min_entry_hint,
-            }
-        )
-
-    # Sort by course_name for a calm, predictable list.
-    out.sort(key=lambda x: x["course_name"])
-    return out
+    # The unfiltered list only changes with the CSV, so load_df builds it once
+    if not q:
+        return json_response(_UNIQUE_COURSES)
+    return build_unique_courses(
+        df[_UNIQUE_COURSE_COLUMNS][_SEARCH_BLOB.str.contains(q.lower(), regex=False)]
+    )
 
 
 @app.get("/api/py/unique_courses/{course_key}")
@@ -1425,8 +1905,7 @@ def unique_course_detail(course_key: str):
     if "course_name" not in df.columns or "course_id" not in df.columns or "university_id" not in df.columns:
         raise HTTPException(status_code=500, detail="course_name/course_id/university_id missing from data")
 
-    mask = df["course_name"].astype(str).apply(lambda n: normalize_course_key(n) == course_key)
-    subset = df[mask]
+    subset = df.iloc[_COURSE_KEY_ROWS.get(course_key, _NO_ROWS)]
     if subset.empty:
         raise HTTPException(status_code=404, detail=f"course_key not found: {course_key}")
 
@@ -1484,7 +1963,7 @@ def unique_course_detail(course_key: str):
 
 
 @app.post("/api/py/assess")
-def assess(payload: OfferAssessRequest):
+async def assess(payload: OfferAssessRequest):
     row = get_row(payload.course_id)
 
     course_info = {
@@ -1503,11 +1982,7 @@ def assess(payload: OfferAssessRequest):
     notes:           List[str]           = []
     score_breakdown: List[Dict[str, Any]] = []
 
-    home_min    = extract_ib_min_points([
-        clean_str(row.get("min_points_home")),
-        clean_str(row.get("min_requirements")),
-        clean_str(row.get("typical_offer")),
-    ])
+    home_min, req_offer = course_offers(row)
     intl_buffer = to_int(row.get("intl_buffer_points")) or 0
 
     threshold_used:    Optional[int]           = None
@@ -1605,10 +2080,6 @@ def assess(payload: OfferAssessRequest):
                     notes, None, payload.course_id, home_min,
                 )
 
-        req_offer = extract_alevel_offer([
-            clean_str(row.get("typical_offer")),
-            clean_str(row.get("min_requirements")),
-        ])
         score, breakdown, sc_notes, margin_sum = score_alevel(predicted_grades, req_offer)
         score_breakdown.extend(breakdown)
         notes.extend(sc_notes)
@@ -1632,16 +2103,18 @@ def assess(payload: OfferAssessRequest):
         raise HTTPException(status_code=400, detail="Unsupported curriculum")
 
     # ── PS ───────────────────────────────────────────────────────────
+    # Only reached once the eligibility filters pass, so rejected applicants
+    # never cost a Gemini call (and neither does the counsellor rewrite below).
     ps_out: Optional[Dict[str, Any]] = None
     if payload.ps is not None:
-        ps_out, ps_err = run_ps_analyzer(row, payload.ps)
+        ps_out, ps_err = await run_ps_analyzer(row, payload.ps)
         if ps_err: notes.append(ps_err)
 
     university_id_str = clean_str(row.get("university_id"))
     score, ps_note    = apply_ps_score(score, ps_out, university_id_str)
     if ps_note: notes.append(ps_note)
 
-    chance_percent = int(max(0, min(100, score)))
+    chance_percent = _clamp100(int(score))
 
     # ── Gemini counsellor rewrite ─────────────────────────────────────
     detail_level = "brief" if chance_percent >= 75 else "detailed"
@@ -1668,7 +2141,7 @@ def assess(payload: OfferAssessRequest):
         "ps_included":    payload.ps is not None,
         "ps_band":        (ps_out.get("scores", {}).get("band") if isinstance(ps_out, dict) else None),
     }
-    polish = counsellor_rewrite_with_gemini(detail_level, payload_summary)
+    polish = await counsellor_rewrite_with_gemini(detail_level, payload_summary)
     if polish:
         strengths    = polish.get("strengths", strengths)
         risks        = polish.get("risks", risks)
@@ -1683,12 +2156,70 @@ def assess(payload: OfferAssessRequest):
     )
 
 
+@app.post("/api/py/assess_batch")
+def assess_batch(payload: AssessBatchRequest):
+    """
+    Grade-only chance/band for a whole shortlist in one call. Scores match
+    /assess without a PS; no counsellor text, breakdown or PS adjustment.
+    """
+    load_df()
+    course_ids = list(dict.fromkeys(payload.course_ids))
+    found      = [cid for cid in course_ids if cid in _SCORE_POS]
+    not_found  = [cid for cid in course_ids if cid not in _SCORE_POS]
+    idx        = np.fromiter((_SCORE_POS[cid] for cid in found), dtype=np.intp, count=len(found))
+
+    if payload.curriculum == "IB":
+        if not payload.ib:
+            raise HTTPException(status_code=400, detail="Missing ib payload for curriculum=IB")
+        P = int(
+            sum(x.grade for x in payload.ib.hl)
+            + sum(x.grade for x in payload.ib.sl)
+            + payload.ib.core_points
+        )
+        home_min     = _SCORE_ARRAYS["home_min"][idx]
+        has_home_min = _SCORE_ARRAYS["has_home_min"][idx]
+        scores       = score_ib_batch(P, home_min, _SCORE_ARRAYS["intl_buffer"][idx], payload.home_or_intl == "intl")
+        # Like /assess: no parseable minimum scores 0 but skips the filters
+        scores       = np.where(has_home_min, scores, 0)
+        eligible     = ~has_home_min | (P > home_min - 3)
+        gated        = has_home_min
+        subjects = [x.subject for x in payload.ib.hl]
+        gate     = required_subject_gate_ib
+    else:
+        if not payload.a_levels:
+            raise HTTPException(status_code=400, detail="Missing a_levels payload for curriculum=A_LEVELS")
+        predicted_grades = [x.grade.strip().upper() for x in payload.a_levels.predicted if x.grade]
+        scores   = score_alevel_batch(predicted_grades, _SCORE_ARRAYS["req_ranks"][idx], _SCORE_ARRAYS["has_req"][idx])
+        eligible = np.ones(len(found), dtype=bool)
+        gated    = eligible
+        subjects = [x.subject for x in payload.a_levels.predicted if x.subject]
+        gate     = required_subject_gate_alevel
+
+    results: List[Dict[str, Any]] = []
+    for cid, score, ok, check in zip(found, scores.tolist(), eligible.tolist(), gated.tolist()):
+        # Subject gates stay per course — they're text rules, not arithmetic
+        req_text = clean_str(_ROW_INDEX[cid].get("required_subjects"))
+        if ok and check and req_text:
+            ok = gate(req_text, subjects)[0]
+        chance = int(score) if ok else 0
+        results.append({
+            "course_id":      cid,
+            "chance_percent": chance,
+            "band":           band_from_score(chance),
+            "eligible":       ok,
+        })
+
+    return {"results": results, "not_found": not_found}
+
+
 @app.post("/api/py/analyse_ps")
 async def analyse_ps(request: Request):
     """
     Standalone line-by-line PS analyser.
     Called from /dashboard/ps — no course_id required.
     FIX: this route was entirely missing. Frontend was getting 404.
+    With "stream": true in the body, responds with NDJSON events instead
+    (see stream_standalone_ps_analysis).
     """
     try:
         body = await request.json()
@@ -1704,8 +2235,14 @@ async def analyse_ps(request: Request):
     if not lines or not isinstance(lines, list):
         return JSONResponse({"error": "lines must be a non-empty array"}, status_code=400)
 
+    if body.get("stream") is True:
+        return StreamingResponse(
+            stream_standalone_ps_analysis(statement, lines, ps_format),
+            media_type="application/x-ndjson",
+        )
+
     try:
-        result, _err = run_standalone_ps_analysis(statement, lines, ps_format)
+        result, _err = await run_standalone_ps_analysis(statement, lines, ps_format)
     except Exception:
         # Last-resort fallback: catch any unexpected crash inside the analyser
         # so the endpoint never propagates a raw 500 to the frontend.
@@ -1847,7 +2384,7 @@ Rules:
 - Never invent scores or outcomes
 - Keep all text concise (≤ 30 words each)"""
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid)
 
     if err or result is None:
         # Graceful fallback — never let this endpoint crash the dashboard
@@ -1940,7 +2477,7 @@ Rules:
 - Never invent entry requirements or outcome statistics
 - Be encouraging but realistic"""
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid, temperature=0.4)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid, temperature=0.4, cacheable=True)
 
     if err or result is None:
         return {
@@ -2050,7 +2587,7 @@ Rules:
 - risk_balance must be exactly one of: Safe-heavy, Balanced, Reach-heavy
 - Never invent outcome statistics or university-specific data not provided"""
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid)
 
     if err or result is None:
         return _rule_advice()
@@ -2166,7 +2703,7 @@ Rules:
 - Never promise outcomes or invent statistics
 - Confidence language: "high confidence", "moderate confidence", "lower confidence" only"""
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid)
 
     if err or result is None:
         return _counterfactual_fallback(payload)
@@ -2274,7 +2811,7 @@ Rules:
 - Be specific about portfolio context, not generic
 - Reach → Wildcard is usually correct; Safe → Insurance usually correct"""
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid, temperature=0.3)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid, temperature=0.3)
 
     if err or result is None:
         return _label_fallback(payload.entries)
@@ -2401,7 +2938,7 @@ async def profile_suggestions(payload: ProfileSuggestionsRequest):
         "One object per gap (max 3). Be specific about this tool, not generic UCAS advice."
     )
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid)
 
     if err or result is None:
         return _profile_suggestions_fallback(payload)
@@ -2438,6 +2975,16 @@ OFFR_FAQ_CONTEXT = (
     "UCAS deadlines: 15 October for Oxford/Cambridge/medicine; 15 January for most others."
 )
 
+# Everything except the student's question is static, so it goes first: Gemini's
+# implicit prefix cache only matches identical leading tokens across requests.
+_FAQ_PROMPT_PREFIX = (
+    "You are a helpful UCAS admissions assistant for the offr tool.\n\n"
+    f"Context:\n{OFFR_FAQ_CONTEXT}\n\n"
+    'Return ONLY valid JSON (no markdown): {"answer": "<2-4 sentences, ≤ 80 words>", "follow_up_questions": ["<q1>", "<q2>"]}\n\n'
+    "Rules: factual, grounded in context, friendly but concise. Say so honestly if you don't know.\n\n"
+    "Student question: "
+)
+
 
 class AskFAQRequest(BaseModel):
     question: str
@@ -2467,15 +3014,10 @@ async def ask_faq(payload: AskFAQRequest):
     if not is_gemini_available():
         return _ask_faq_fallback()
 
-    prompt = (
-        "You are a helpful UCAS admissions assistant for the offr tool.\n\n"
-        f"Context:\n{OFFR_FAQ_CONTEXT}\n\n"
-        f"Student question: {question}\n\n"
-        'Return ONLY valid JSON (no markdown): {"answer": "<2-4 sentences, ≤ 80 words>", "follow_up_questions": ["<q1>", "<q2>"]}\n\n'
-        "Rules: factual, grounded in context, friendly but concise. Say so honestly if you don't know."
-    )
+    prompt = _FAQ_PROMPT_PREFIX + question
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid, temperature=0.3)
+    # FAQ questions repeat heavily across students — safe to replay a cached answer
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid, temperature=0.3, cacheable=True)
 
     if err or result is None:
         return _ask_faq_fallback()
@@ -2532,21 +3074,20 @@ class PSEvaluateMeta(BaseModel):
 
 # ── Helpers ───────────────────────────────────────────────────
 
+_TIER_TO_WEIGHT_CLASS = {"heavy": "PS_HEAVY", "moderate": "PS_MED", "light": "PS_LIGHT"}
+_WEIGHT_CLASS_TO_TIER = {"PS_HEAVY": "heavy", "PS_MED": "moderate", "PS_LIGHT": "light", "UNKNOWN": "light"}
+
+
 def _ps_weight_class(uni_raw: Optional[str]) -> str:
     if not uni_raw:
         return "UNKNOWN"
     uid = resolve_uni_id(uni_raw) or uni_raw.strip().upper()
-    if uid in PS_HEAVY_UNIS:
-        return "PS_HEAVY"
-    if uid in PS_MODERATE_UNIS:
-        return "PS_MED"
-    return "PS_LIGHT"
+    return _TIER_TO_WEIGHT_CLASS[_UID_TO_TIER.get(uid, "light")]
 
 
 def _ps_impact_points(weight_class: str, ps_band: str) -> int:
-    tier_map = {"PS_HEAVY": "heavy", "PS_MED": "moderate", "PS_LIGHT": "light", "UNKNOWN": "light"}
-    tier = tier_map.get(weight_class, "light")
-    return PS_SCORE_IMPACT.get((tier, ps_band), 0)
+    tier = _WEIGHT_CLASS_TO_TIER.get(weight_class, "light")
+    return PS_SCORE_IMPACT[tier].get(ps_band, 0)
 
 
 def _ps_band_from_score(score: int) -> str:
@@ -2681,7 +3222,7 @@ def _fallback_ps_evaluate(
     t0: float,
 ) -> Dict[str, Any]:
     heur       = ps_heuristics(ps_text)
-    words      = re.findall(r"[A-Za-z']+", ps_text)
+    words      = _RE_WORDS.findall(ps_text)
     word_count = len(words)
 
     evidence_markers = heur.get("evidence_markers_count", 0)
@@ -2881,7 +3422,7 @@ async def ps_evaluate(request: Request):
         payload.grades_summary,
     )
 
-    ai_result, ai_err, latency_ms = call_gemini_json(
+    ai_result, ai_err, latency_ms = await acall_gemini_json(
         prompt,
         trace_id=request_id,
         temperature=0.25,
@@ -2892,6 +3433,8 @@ async def ps_evaluate(request: Request):
     if ai_err is not None:
         code_map = {
             "PROVIDER_TIMEOUT":    503,
+            "PROVIDER_UNAVAILABLE": 503,
+            "PROVIDER_BUSY":       503,
             "AI_UNAVAILABLE":      503,
             "PROVIDER_RATE_LIMIT": 429,
             "PARSE_ERROR":         502,
@@ -2988,7 +3531,7 @@ async def ps_evaluate(request: Request):
         },
         "meta": {
             "request_id": request_id,
-            "model": os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+            "model": _GEMINI_MODEL_NAME,
             "latency_ms": latency_total,
         },
     })
@@ -110,7 +110,7 @@ async def profile_suggestions(payload: ProfileSuggestionsRequest):
         "One object per gap (max 3). Be specific about this tool, not generic UCAS advice."
     )
 
-    result, err, latency_ms = call_gemini_json(prompt, trace_id=tid)
+    result, err, latency_ms = await acall_gemini_json(prompt, trace_id=tid)
 
     if err or result is None:
         return _profile_suggestions_fallback(payload)